@@ -1,21 +1,21 @@
 import os, getpass
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import MessagesState
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
-from IPython.display import Image, display
+from cassette import chat_model, replaying
+from delta_saver import DeltaMemorySaver
 
 # Set environment variables for API keys
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 
 # Define arithmetic tools
@@ -35,7 +35,7 @@ def divide(a: int, b: int) -> float:
 tools = [add, multiply, divide]
 
 # Initialize LLM with tool bindings
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 llm_with_tools = llm.bind_tools(tools)
 
 # Import necessary modules
@@ -66,8 +66,8 @@ builder.add_conditional_edges(
 builder.add_edge("tools", "assistant")  # Loops back to assistant
 
 # Add memory to the graph using a checkpointer
-
-memory = MemorySaver()
+# Each step stores only the messages it appended, with a full snapshot every 10 steps
+memory = DeltaMemorySaver(snapshot_every=10)
 
 # Compile the graph with memory support
 react_graph_memory = builder.compile(checkpointer=memory)
@@ -88,3 +88,5 @@ messages = [HumanMessage(content="Multiply that by 2.")]
 messages = react_graph_memory.invoke({"messages": messages}, config)
 for m in messages['messages']:
     m.pretty_print()
+
+print(f"Checkpointed channel data: {memory.stored_bytes():,} bytes")
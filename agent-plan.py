@@ -0,0 +1,197 @@
+import os, getpass
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+from pydantic import BaseModel, Field
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.graph import START, END, StateGraph
+from render import display_graph
+from cassette import chat_model, replaying
+
+# Set environment variables for API keys
+def _set_env(var: str):
+    if not os.environ.get(var):
+        os.environ[var] = getpass.getpass(f"{var}: ")
+
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+
+
+# Define arithmetic tools (deterministic, so they are safe to run without the LLM watching)
+def multiply(a: float, b: float) -> float:
+    """Multiply two numbers."""
+    return a * b
+
+def add(a: float, b: float) -> float:
+    """Add two numbers."""
+    return a + b
+
+def divide(a: float, b: float) -> float:
+    """Divide two numbers."""
+    return a / b
+
+tools = {t.__name__: t for t in [add, multiply, divide]}
+
+
+# 📋 Plan schema: one LLM call returns the whole dependency graph of tool calls
+class Step(BaseModel):
+    tool: str = Field(description=f"One of: {', '.join(tools)}")
+    args: dict[str, Union[float, str]] = Field(
+        description='Tool arguments. Use a number, or "$N" to use the output of step N (0-based).'
+    )
+
+class Plan(BaseModel):
+    steps: list[Step]
+
+
+# Initialize LLM: one call to plan, one call to phrase the answer
+llm = chat_model(model="gpt-4o")
+planner = llm.with_structured_output(Plan)
+
+planner_msg = SystemMessage(content=(
+    "You are a helpful assistant tasked with performing arithmetic on a set of inputs. "
+    "Do not compute anything yourself. Write a plan of tool calls that answers the latest request; "
+    "a step may use the output of an earlier step as an argument by writing \"$N\". "
+    "Earlier results in the conversation can be used as plain numbers."
+))
+answer_msg = SystemMessage(content="Answer the user's latest request using the tool results above.")
+
+
+_REF = re.compile(r"\$(\d+)")
+MAX_REPLANS = 2  # planner retries when a plan does not validate
+
+def _deps(step: Step) -> list[int]:
+    """Steps whose outputs `step` uses."""
+    return [int(m.group(1)) for v in step.args.values() if isinstance(v, str) and (m := _REF.fullmatch(v))]
+
+def _check_plan(steps: list[Step]) -> Union[str, None]:
+    """What is wrong with the plan, or None if every tool and reference is valid."""
+    for i, step in enumerate(steps):
+        if step.tool not in tools:
+            return f"step {i} uses the unknown tool {step.tool!r}"
+        for name, value in step.args.items():
+            if not isinstance(value, str):
+                continue
+            if match := _REF.fullmatch(value):
+                if int(match.group(1)) >= i:
+                    return f"step {i} argument {name!r} references step {match.group(1)}, which does not run before it"
+                continue
+            try:
+                float(value)
+            except ValueError:
+                return f'step {i} argument {name!r} is {value!r}, which is neither a number nor "$N"'
+    return None
+
+def _resolve(value, results: list):
+    """Replace a "$N" reference with the output of step N."""
+    if isinstance(value, str):
+        match = _REF.fullmatch(value)
+        return results[int(match.group(1))] if match else float(value)
+    return value
+
+def _levels(steps: list[Step]) -> list[list[int]]:
+    """Group steps into waves; every step in a wave only depends on earlier waves."""
+    level = []
+    for i, step in enumerate(steps):
+        deps = _deps(step)
+        if any(d >= i for d in deps):
+            raise ValueError(f"Step {i} references a step that does not run before it: {deps}")
+        level.append(1 + max((level[d] for d in deps), default=-1))
+    waves = [[] for _ in range(max(level, default=-1) + 1)]
+    for i, lvl in enumerate(level):
+        waves[lvl].append(i)
+    return waves
+
+
+# Planner node - a single LLM round trip for the whole chain (another one only if the plan is invalid)
+def plan(state: MessagesState):
+    messages = [planner_msg] + state["messages"]
+    for _ in range(MAX_REPLANS + 1):
+        steps = planner.invoke(messages).steps
+        problem = _check_plan(steps)
+        if problem is None:
+            break
+        messages = messages + [HumanMessage(content=f"That plan is invalid: {problem}. Write a corrected plan.")]
+    else:
+        return {"messages": [AIMessage(content=f"I could not make a valid plan: {problem}")]}
+    # Record the plan as tool calls so the history looks like a regular tool-calling agent
+    tool_calls = [
+        {"name": s.tool, "args": s.args, "id": f"call_{uuid.uuid4().hex[:12]}"}
+        for s in steps
+    ]
+    return {"messages": [AIMessage(content="", tool_calls=tool_calls)]}
+
+# Executor node - runs the plan locally, independent steps concurrently
+def execute(state: MessagesState):
+    call_msg = state["messages"][-1]
+    steps = [Step(tool=tc["name"], args=tc["args"]) for tc in call_msg.tool_calls]
+    results = [None] * len(steps)
+    failed = set()
+
+    def run(i):
+        step = steps[i]
+        failed_deps = [d for d in _deps(step) if d in failed]
+        if failed_deps:  # never feed an error string to a tool as an argument
+            failed.add(i)
+            results[i] = f"Error: not run, step {failed_deps[0]} failed"
+            return
+        try:
+            args = {k: _resolve(v, results) for k, v in step.args.items()}
+            results[i] = tools[step.tool](**args)
+        except Exception as e:  # surface tool errors to the answer step instead of crashing the run
+            failed.add(i)
+            results[i] = f"Error: {e!r}"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for wave in _levels(steps):
+            list(executor.map(run, wave))
+
+    return {"messages": [
+        ToolMessage(content=str(result), name=tc["name"], tool_call_id=tc["id"])
+        for tc, result in zip(call_msg.tool_calls, results)
+    ]}
+
+# Answer node - the second and last LLM round trip
+def answer(state: MessagesState):
+    return {"messages": [llm.invoke(state["messages"] + [answer_msg])]}
+
+
+# Define the computation graph: plan -> execute -> answer
+builder = StateGraph(MessagesState)
+builder.add_node("plan", plan)
+builder.add_node("execute", execute)
+builder.add_node("answer", answer)
+
+builder.add_edge(START, "plan")
+# Without a valid plan, the planner's explanation is the answer
+builder.add_conditional_edges("plan", lambda state: "execute" if state["messages"][-1].tool_calls else END, ["execute", END])
+builder.add_edge("execute", "answer")
+builder.add_edge("answer", END)
+
+# Add memory so follow-up requests can build on earlier results
+memory = MemorySaver()
+plan_graph = builder.compile(checkpointer=memory)
+
+# Visualize graph
+display_graph(plan_graph)
+
+# Assign a thread ID to retain memory across steps
+config = {"configurable": {"thread_id": "1"}}
+
+# Example query: chained operations in 2 LLM calls instead of 4
+messages = [HumanMessage(content="Add 3 and 4. Multiply the output by 2. Divide the output by 5")]
+messages = plan_graph.invoke({"messages": messages}, config)
+for m in messages['messages']:
+    m.pretty_print()
+
+# Follow-up on the same thread
+messages = [HumanMessage(content="Multiply that by 2.")]
+messages = plan_graph.invoke({"messages": messages}, config)
+for m in messages['messages']:
+    m.pretty_print()
@@ -3,30 +3,35 @@ from langgraph.graph import MessagesState
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
-from IPython.display import Image, display
-from langchain_openai import ChatOpenAI
+from render import display_graph
+from cassette import chat_model, replaying
+from tool_cache import cacheable
 # Set environment variables for API keys
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
-# Enable LangSmith tracing for logging
-_set_env("LANGCHAIN_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+    # Enable LangSmith tracing for logging
+    _set_env("LANGCHAIN_API_KEY")
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 
-# Define arithmetic functions as tools
+# Define arithmetic functions as tools (pure, so results are cached by arguments)
+@cacheable()
 def multiply(a: int, b: int) -> int:
     """Multiply a and b."""
     return a * b
 
+@cacheable()
 def add(a: int, b: int) -> int:
     """Adds a and b."""
     return a + b
 
+@cacheable()
 def divide(a: int, b: int) -> float:
     """Divide a and b."""
     return a / b
@@ -35,15 +40,22 @@ def divide(a: int, b: int) -> float:
 tools = [add, multiply, divide]
 
 # Initialize the chat model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 
-# Bind tools to the LLM (sequential execution for accuracy)
-llm_with_tools = llm.bind_tools(tools, parallel_tool_calls=False)
+# Bind tools to the LLM (parallel tool calls: independent operations come back in one turn)
+llm_with_tools = llm.bind_tools(tools, parallel_tool_calls=True)
+
+# Max tool calls ToolNode runs at once on its thread pool
+TOOL_CONCURRENCY = 4
 
 
 
 # System message to guide the assistant
-sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
+sys_msg = SystemMessage(content=(
+    "You are a helpful assistant tasked with performing arithmetic on a set of inputs. "
+    "Request every operation whose inputs are already known in the same turn; "
+    "only wait for a tool result when a later operation needs it."
+))
 
 # Assistant node - runs the model with tools
 def assistant(state: MessagesState):
@@ -67,12 +79,28 @@ builder.add_edge("tools", "assistant")  # Loops back to assistant
 react_graph = builder.compile()
 
 # Visualize graph
-display(Image(react_graph.get_graph(xray=True).draw_mermaid_png()))
+display_graph(react_graph, xray=True)
+
+# Tool calls emitted in one assistant turn never depend on each other (the model
+# hasn't seen their results yet), so ToolNode runs them concurrently on a thread
+# pool bounded by `max_concurrency` and returns all ToolMessages in one superstep.
+config = {"max_concurrency": TOOL_CONCURRENCY}
 
-# Example query: chained operations
+# Example query: chained operations (each step needs the previous result)
 messages = [HumanMessage(content="Add 3 and 4. Multiply the output by 2. Divide the output by 5")]
-messages = react_graph.invoke({"messages": messages})
+messages = react_graph.invoke({"messages": messages}, config)
+
+# Print responses
+for m in messages['messages']:
+    m.pretty_print()
+
+# Example query: independent operations (one assistant -> tools round trip)
+messages = [HumanMessage(content="Add 3 and 4. Multiply 5 by 6. Divide 10 by 2")]
+messages = react_graph.invoke({"messages": messages}, config)
 
 # Print responses
 for m in messages['messages']:
     m.pretty_print()
+
+# Tool result cache counters
+print("Tool cache:", {t.__name__: t.cache.stats() for t in tools})
@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Union
+
+from retention import thread_ids
+
+# ✅ Approval queue for threads parked on a breakpoint
+# With `interrupt_before=[...]` a run stops and its thread is just checkpoints: no
+# frame, no `input()` waiting. `ApprovalQueue` is the reviewer's side of that. It
+# lists the parked threads from the checkpointer (a thread is parked at a node when
+# `graph.get_state` has it in `next`, so Pregel itself decides) and resumes or
+# rejects them by thread id, one at a time or in bulk. Nothing is kept in memory
+# between calls, so thousands of threads can wait, across restarts with a durable
+# saver. Listing loads each thread's latest state, O(threads x state size), spread
+# over the worker pool; behind a TieredSaver those reads come from the hot cache.
+#
+#   approvals = ApprovalQueue(graph)
+#   for parked in approvals.pending():                # node defaults to interrupt_before
+#       ...
+#   approvals.approve([p for p in ...])               # resume: graph.invoke(None, thread)
+#   approvals.reject(ids, update=lambda values: {...})  # write the update as the parked node
+#   approvals.stats()                                 # resumes/s over all bulk calls
+#
+# A resume costs one thread's run, independent of how many threads are waiting.
+#
+# A decision applies to the state it was made on. Each thread is read again first:
+# a `ParkedThread` is only resumed or rejected while the thread's latest checkpoint
+# is still the one it was listed at, so when two reviewers work from the same
+# listing the second one's stale approval is skipped instead of running a tool call
+# nobody has seen; a bare thread id only needs the thread to still be parked.
+# Decisions on one thread through the same queue are serialized; across processes
+# the re-read narrows, but does not close, the window between check and resume.
+
+
+_SKIPPED = object()
+
+
+class ParkedThread(NamedTuple):
+    thread_id: str
+    node: str  # the breakpoint node it waits before
+    checkpoint_id: str
+
+
+class ApprovalQueue:
+    """Lists threads waiting before an interrupt_before node and resumes or rejects them by id."""
+
+    def __init__(self, graph, max_workers: int = 8):
+        self.graph = graph
+        self.max_workers = max_workers
+        self.resumed = 0
+        self.rejected = 0
+        self.skipped = 0  # decisions dropped because the thread was no longer parked as listed
+        self.resume_seconds = 0.0  # wall time spent in approve()
+        self._locks: dict[str, threading.Lock] = {}  # one decision per thread at a time
+
+    @staticmethod
+    def _config(thread_id: str) -> dict:
+        return {"configurable": {"thread_id": thread_id}}
+
+    # ---------------------------
+    # Listing
+    # ---------------------------
+    def pending(self, node: Union[str, Iterable[str], None] = None) -> list[ParkedThread]:
+        """Threads parked before `node` (default: any of the graph's interrupt_before nodes); loads each thread's state."""
+        if node is None:
+            wanted = set(self.graph.interrupt_before_nodes or ())
+        else:
+            wanted = {node} if isinstance(node, str) else set(node)
+
+        def parked_at(thread_id: str) -> list[ParkedThread]:
+            state = self.graph.get_state(self._config(thread_id))
+            checkpoint_id = state.config["configurable"].get("checkpoint_id") if state.config else None
+            return [ParkedThread(thread_id, name, checkpoint_id) for name in state.next if name in wanted]
+
+        found = self._each(parked_at, thread_ids(self.graph.checkpointer))
+        return [parked for thread_parked in found.values() for parked in thread_parked]
+
+    # ---------------------------
+    # Decisions
+    # ---------------------------
+    def _each(self, fn: Callable[[str], Any], ids: list[str]) -> dict[str, Any]:
+        if len(ids) <= 1 or self.max_workers <= 1:
+            return {thread_id: fn(thread_id) for thread_id in ids}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="approvals") as executor:
+            return dict(zip(ids, executor.map(fn, ids)))
+
+    def _decide(self, ids, decide: Callable[[dict, str, Any], Any]) -> dict[str, Any]:
+        """Run decide(config, node, state) on each thread still parked as listed; others map to _SKIPPED."""
+        listed = {}
+        for item in ids:
+            listed[item.thread_id if isinstance(item, ParkedThread) else item] = item
+        wanted = set(self.graph.interrupt_before_nodes or ())
+
+        def one(thread_id: str):
+            config = self._config(thread_id)
+            with self._locks.setdefault(thread_id, threading.Lock()):
+                state = self.graph.get_state(config)
+                parked = listed[thread_id]
+                if isinstance(parked, ParkedThread):
+                    # The decision was made on that listing: a thread that has moved on since
+                    # (another reviewer resumed it and it parked again) waits for a new look
+                    current = state.config["configurable"].get("checkpoint_id") if state.config else None
+                    node = parked.node if current == parked.checkpoint_id and parked.node in state.next else None
+                else:
+                    node = next((n for n in state.next if not wanted or n in wanted), None)
+                if node is None:
+                    return _SKIPPED
+                return decide(config, node, state)
+
+        results = self._each(one, list(listed))
+        self.skipped += sum(result is _SKIPPED for result in results.values())
+        return results
+
+    def approve(self, ids: Iterable[Union[str, ParkedThread]], **kwargs) -> dict[str, Any]:
+        """Resume each thread past its breakpoint; returns thread id -> final state values.
+
+        Threads that are no longer parked (or, for a `ParkedThread`, no longer at its
+        listed checkpoint) are skipped and left out of the result.
+        """
+        start = time.perf_counter()
+        results = self._decide(ids, lambda config, node, state: self.graph.invoke(None, config, **kwargs))
+        self.resume_seconds += time.perf_counter() - start
+        resumed = {thread_id: values for thread_id, values in results.items() if values is not _SKIPPED}
+        self.resumed += len(resumed)
+        return resumed
+
+    def reject(
+        self,
+        ids: Iterable[Union[str, ParkedThread]],
+        update: Union[dict, Callable[[dict], Optional[dict]], None] = None,
+    ) -> int:
+        """Skip each thread's parked node: `update` (or update(values)) is written as that node's output.
+
+        Returns how many threads were rejected; threads skipped as in `approve` are not counted.
+        """
+        def skip(config, node, state):
+            self.graph.update_state(config, update(state.values) if callable(update) else update, as_node=node)
+
+        results = self._decide(ids, skip)
+        rejected = sum(result is not _SKIPPED for result in results.values())
+        self.rejected += rejected
+        return rejected
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "resumed": self.resumed,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "resumes_per_second": self.resumed / self.resume_seconds if self.resume_seconds else None,
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
+
+# 🚀 Batch runs over a compiled graph
+# Run many inputs through one graph with at most `max_concurrency` in flight, either
+# on a thread pool (`run_batch`) or on the event loop (`arun_batch`). Results come
+# back in input order (`ordered=True`) or as soon as each one finishes, with the
+# per-item latency. A failing item is reported in its result instead of stopping
+# the batch, and inputs are consumed lazily so generators of any size work.
+
+
+@dataclass
+class BatchResult:
+    index: int
+    input: Any
+    output: Any = None
+    error: Optional[BaseException] = None
+    latency: float = 0.0  # seconds spent in invoke for this item
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _config_for(configs, index: int) -> Optional[dict]:
+    """`configs` may be None, one config shared by every input, or a list with one per input."""
+    if configs is None or isinstance(configs, dict):
+        return configs
+    return configs[index]
+
+
+def _invoke(graph, index: int, item, config) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        output = graph.invoke(item, config)
+        return BatchResult(index, item, output=output, latency=time.perf_counter() - start)
+    except Exception as e:
+        return BatchResult(index, item, error=e, latency=time.perf_counter() - start)
+
+
+def run_batch(
+    graph,
+    inputs: Iterable,
+    configs=None,
+    max_concurrency: int = 8,
+    ordered: bool = True,
+) -> Iterator[BatchResult]:
+    """Invoke `graph` on every input using a bounded thread pool."""
+    pending = {}  # future -> index
+    done_early = {}  # index -> result waiting for its turn (ordered mode)
+    next_index = 0
+    items = iter(enumerate(inputs))
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        def submit_next() -> bool:
+            entry = next(items, None)
+            if entry is None:
+                return False
+            index, item = entry
+            future = executor.submit(_invoke, graph, index, item, _config_for(configs, index))
+            pending[future] = index
+            return True
+
+        # Keep the pool busy without materializing the whole input up front
+        while len(pending) < max_concurrency and submit_next():
+            pass
+
+        try:
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del pending[future]
+                    submit_next()
+                    result = future.result()
+                    if not ordered:
+                        yield result
+                        continue
+                    done_early[result.index] = result
+                    while next_index in done_early:
+                        yield done_early.pop(next_index)
+                        next_index += 1
+        finally:
+            for future in pending:  # consumer stopped early: drop runs that haven't started
+                future.cancel()
+
+
+async def arun_batch(
+    graph,
+    inputs: Iterable,
+    configs=None,
+    max_concurrency: int = 8,
+    ordered: bool = True,
+) -> AsyncIterator[BatchResult]:
+    """Async version of `run_batch` using `graph.ainvoke` and at most `max_concurrency` tasks."""
+    async def ainvoke(index: int, item) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            output = await graph.ainvoke(item, _config_for(configs, index))
+            return BatchResult(index, item, output=output, latency=time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(index, item, error=e, latency=time.perf_counter() - start)
+
+    items = iter(enumerate(inputs))
+    running = set()
+    done_early = {}
+    next_index = 0
+
+    def submit_next() -> bool:
+        entry = next(items, None)
+        if entry is None:
+            return False
+        running.add(asyncio.create_task(ainvoke(*entry)))
+        return True
+
+    while len(running) < max_concurrency and submit_next():
+        pass
+
+    try:
+        while running:
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                running.discard(task)
+                submit_next()
+                result = task.result()
+                if not ordered:
+                    yield result
+                    continue
+                done_early[result.index] = result
+                while next_index in done_early:
+                    yield done_early.pop(next_index)
+                    next_index += 1
+    finally:
+        for task in running:  # consumer stopped early: don't leave runs behind
+            task.cancel()
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, PrivateAttr
+
+# 📼 Record/replay cassettes for chat models
+# Wrap a real model to record every request/response pair (including tool calls and
+# streamed chunks) to a JSON-lines file, then replay them later with no network and
+# no API key. Scripts opt in through environment variables:
+#
+#   LLM_CASSETTE=<path>            -> use the cassette at <path>
+#   LLM_CASSETTE_MODE=record       -> call the real model and append to the cassette
+#   LLM_CASSETTE_MODE=replay       -> (default) answer from the cassette only
+#   LLM_CASSETTE_LATENCY=<sec>     -> synthetic delay before each replayed response
+#   LLM_CASSETTE_CHUNK_LATENCY=<sec> -> synthetic delay between replayed stream chunks
+
+
+def _normalize(message: BaseMessage) -> dict:
+    """The parts of a message that matter to the model; ids change on every run."""
+    data = {"type": message.type, "content": message.content, "name": message.name}
+    if isinstance(message, AIMessage):
+        data["tool_calls"] = [(tc["name"], tc["args"]) for tc in message.tool_calls]
+    return data
+
+
+def request_key(messages: list[BaseMessage], stop: Optional[list[str]], kwargs: dict, settings: Optional[dict] = None) -> str:
+    payload = {"settings": settings or {}, "messages": [_normalize(m) for m in messages], "stop": stop, "kwargs": kwargs}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _strip_id(message: BaseMessage) -> dict:
+    # Drop the recorded id so replayed messages get a fresh run id, like a live call
+    return message_to_dict(message.model_copy(update={"id": None}))
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records responses of `model` to `path`, or replays them when `model` is None.
+
+    `settings` (model name, temperature, ...) is part of every request key, so models with
+    different settings sharing a cassette never answer for each other.
+    """
+
+    path: str
+    model: Optional[BaseChatModel] = None
+    settings: dict = {}
+    latency: float = 0.0
+    chunk_latency: float = 0.0
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    _entries: dict = PrivateAttr(default_factory=dict)
+    _plays: dict = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry.pop("key"), []).append(entry)
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def recording(self) -> bool:
+        return self.model is not None
+
+    def bind_tools(self, tools, *, tool_choice=None, strict=None, **kwargs):
+        """Format tools the way ChatOpenAI does, so recorded and replayed requests hash the same."""
+        formatted = [convert_to_openai_tool(t, strict=strict) for t in tools]
+        if tool_choice == "any":
+            tool_choice = "required"
+        elif tool_choice is True:
+            tool_choice = {"type": "function", "function": {"name": formatted[0]["function"]["name"]}}
+        elif isinstance(tool_choice, str) and tool_choice not in ("auto", "none", "required"):
+            tool_choice = {"type": "function", "function": {"name": tool_choice}}
+        if tool_choice:
+            kwargs["tool_choice"] = tool_choice
+        return self.bind(tools=formatted, **kwargs)
+
+    # ---------------------------
+    # Cassette bookkeeping
+    # ---------------------------
+    def _record(self, key: str, entry: dict):
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, **entry}, separators=(",", ":")) + "\n")
+
+    def _replay(self, key: str) -> dict:
+        """Recorded responses for a request play back in order; the last one repeats."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise LookupError(
+                    f"No recorded response for request {key[:12]} in {self.path}; "
+                    "record it first with LLM_CASSETTE_MODE=record"
+                )
+            n = self._plays.get(key, 0)
+            self._plays[key] = n + 1
+            return entries[min(n, len(entries) - 1)]
+
+    @staticmethod
+    def _message(entry: dict) -> AIMessage:
+        if "message" in entry:
+            return messages_from_dict([entry["message"]])[0]
+        chunks = messages_from_dict(entry["chunks"])
+        merged = chunks[0]
+        for chunk in chunks[1:]:
+            merged = merged + chunk
+        return message_chunk_to_message(merged)
+
+    @staticmethod
+    def _chunks(entry: dict) -> list[AIMessageChunk]:
+        if "chunks" in entry:
+            return messages_from_dict(entry["chunks"])
+        message = messages_from_dict([entry["message"]])[0]
+        return [AIMessageChunk(**message.model_dump(exclude={"type", "invalid_tool_calls"}))]
+
+    def _key(self, messages, stop, kwargs) -> str:
+        return request_key(messages, stop, kwargs, self.settings)
+
+    # ---------------------------
+    # Sync API
+    # ---------------------------
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if self.recording:
+            result = self.model._generate(messages, stop=stop, **kwargs)
+            self._record(key, {"message": _strip_id(result.generations[0].message)})
+            return result
+        entry = self._replay(key)
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if self.recording:
+            chunks = []
+            for chunk in self.model._stream(messages, stop=stop, **kwargs):
+                chunks.append(_strip_id(chunk.message))
+                yield chunk
+            # Only a complete answer is recorded: a stream that was stopped, cancelled or
+            # failed never gets here
+            self._record(key, {"chunks": chunks})
+            return
+        entry = self._replay(key)
+        time.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(entry)):
+            if i:
+                time.sleep(self.chunk_latency)
+            yield ChatGenerationChunk(message=chunk)
+
+    # ---------------------------
+    # Async API (so synthetic latency never blocks the event loop)
+    # ---------------------------
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if self.recording:
+            result = await self.model._agenerate(messages, stop=stop, **kwargs)
+            self._record(key, {"message": _strip_id(result.generations[0].message)})
+            return result
+        entry = self._replay(key)
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if self.recording:
+            chunks = []
+            async for chunk in self.model._astream(messages, stop=stop, **kwargs):
+                chunks.append(_strip_id(chunk.message))
+                yield chunk
+            # Only a complete answer is recorded: a stream that was stopped, cancelled or
+            # failed never gets here
+            self._record(key, {"chunks": chunks})
+            return
+        entry = self._replay(key)
+        await asyncio.sleep(self.latency)
+        for i, chunk in enumerate(self._chunks(entry)):
+            if i:
+                await asyncio.sleep(self.chunk_latency)
+            yield ChatGenerationChunk(message=chunk)
+
+
+def replaying() -> bool:
+    """True when scripts run purely from a cassette and need no API keys."""
+    return bool(os.environ.get("LLM_CASSETTE")) and os.environ.get("LLM_CASSETTE_MODE", "replay") == "replay"
+
+
+def chat_model(**kwargs) -> BaseChatModel:
+    """Drop-in for `ChatOpenAI(**kwargs)` that honours the LLM_CASSETTE* environment variables."""
+    path = os.environ.get("LLM_CASSETTE")
+    if not path:
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(**kwargs)
+
+    model = None
+    if not replaying():
+        from langchain_openai import ChatOpenAI
+        model = ChatOpenAI(**kwargs)
+    settings = dict(kwargs)
+    if "model_name" in settings:  # ChatOpenAI accepts either spelling
+        settings["model"] = settings.pop("model_name")
+    return CassetteChatModel(
+        path=path,
+        model=model,
+        settings=settings,
+        latency=float(os.environ.get("LLM_CASSETTE_LATENCY", "0")),
+        chunk_latency=float(os.environ.get("LLM_CASSETTE_CHUNK_LATENCY", "0")),
+    )
@@ -1,13 +1,13 @@
 import os
 import getpass
 from typing import Annotated
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, HumanMessage, AnyMessage
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from typing_extensions import TypedDict
-from IPython.display import Image, display
+from render import display_graph
+from cassette import chat_model, replaying
 import re
 
 # 🔑 Set OpenAI API Key
@@ -15,10 +15,11 @@ def _set_env(var: str):
     if var not in os.environ:
         os.environ[var] = getpass.getpass(f"Enter {var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
 # 🤖 Initialize OpenAI Model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 
 # 🛠️ Define a Multiplication Tool
 def multiply(a: int, b: int) -> int:
@@ -43,7 +44,7 @@ builder.add_edge("tool_calling_llm", END)
 graph = builder.compile()
 
 # 📊 Display Graph Visualization
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # 💬 Test the Graph with Messages
 
@@ -0,0 +1,185 @@
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+# 🧬 Delta checkpoints
+# `MemorySaver` stores a channel's whole value every time its version changes, and
+# the messages channel changes on every step, so an N-step thread keeps N copies of
+# a growing history: O(N²) message data. `DeltaMemorySaver` stores a list value as a
+# splice of the value it had in the parent checkpoint: a pointer to that base version,
+# the replaced range and the new items. A step that appends a message stores that one
+# message; a fork that rewrites one message (time travel's `update_state` on an old
+# checkpoint) stores only the rewritten message and shares the rest of the history
+# with the checkpoint it forked from, however many branches are forked from it.
+# Every `snapshot_every` links the full value is stored again (a value whose parent
+# ends a full chain is spliced against that chain's snapshot instead, if they share
+# anything), so rebuilding any checkpoint decodes at most `snapshot_every` blobs.
+#
+# Recently put or loaded list values are kept (as shallow copies) for `recent_values`
+# channel versions, so finding the splice is an identity scan, not a decode. Like
+# LangGraph itself, this assumes nodes return new state values instead of mutating
+# the ones they were given.
+#
+# Everything else (get_tuple, list, put_writes, get_delta_channel_history, the async
+# variants, get_state_history and forking from old checkpoints) is inherited from
+# MemorySaver unchanged: the saver's serializer decodes delta blobs itself, so every
+# read path MemorySaver has sees whole values.
+
+# blob type tag: (base_version, depth, start, stop, serialized new items, (thread, ns, channel))
+DELTA = "delta"
+
+
+def _splice(base: list, value: list) -> tuple[int, int]:
+    """(start, stop) such that value == base[:start] + value[start:len(value) - len(base) + stop] + base[stop:]."""
+    def same(a, b):
+        return a is b or a == b
+
+    limit = min(len(base), len(value))
+    start = 0
+    while start < limit and same(base[start], value[start]):
+        start += 1
+    suffix = 0
+    while suffix < limit - start and same(base[-1 - suffix], value[-1 - suffix]):
+        suffix += 1
+    return start, len(base) - suffix
+
+
+class _DeltaSerde:
+    """Wraps the saver's serializer so `loads_typed` rebuilds delta blobs from their base in `blobs`."""
+
+    def __init__(self, serde, blobs: dict):
+        self.serde = serde
+        self.blobs = blobs
+
+    def dumps_typed(self, obj):
+        return self.serde.dumps_typed(obj)
+
+    def loads_typed(self, data):
+        if data[0] != DELTA:
+            return self.serde.loads_typed(data)
+        base_version, _, start, stop, items, (thread_id, checkpoint_ns, channel) = data[1]
+        base = self.loads_typed(self.blobs[(thread_id, checkpoint_ns, channel, base_version)])
+        return base[:start] + self.serde.loads_typed(items) + base[stop:]
+
+    def __getattr__(self, name):
+        return getattr(self.serde, name)
+
+
+class DeltaMemorySaver(InMemorySaver):
+    """In-memory checkpointer that stores list values as splices of their parent checkpoint's value."""
+
+    def __init__(self, *, snapshot_every: int = 10, recent_values: int = 64, serde=None):
+        super().__init__(serde=serde)
+        self.serde = _DeltaSerde(self.serde, self.blobs)
+        self.snapshot_every = snapshot_every
+        self.recent_values = recent_values
+        # (thread, ns, channel, version) -> (shallow copy of the list value, delta depth)
+        self._recent: "OrderedDict[tuple[str, str, str, Any], tuple[list, int]]" = OrderedDict()
+
+    def _remember(self, key: tuple[str, str, str, Any], value: list, depth: int) -> None:
+        self._recent[key] = (list(value), depth)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.recent_values:
+            self._recent.popitem(last=False)
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def _candidate(self, thread_id: str, checkpoint_ns: str, channel: str, version) -> Optional[tuple[Any, list, int]]:
+        """(version, value, depth) of a stored list version, decoding it only if it isn't recent."""
+        key = (thread_id, checkpoint_ns, channel, version)
+        if key not in self._recent:
+            if key not in self.blobs:
+                return None
+            blob = self.blobs[key]
+            value = self.serde.loads_typed(blob)
+            if not isinstance(value, list):
+                return None
+            self._remember(key, value, blob[1][1] if blob[0] == DELTA else 0)
+        value, depth = self._recent[key]
+        return version, value, depth
+
+    def _base(self, thread_id: str, checkpoint_ns: str, channel: str, parent_versions: dict) -> Optional[tuple[Any, list, int]]:
+        """Version to splice against: the parent checkpoint's value, or the snapshot under it once its chain is full."""
+        version = parent_versions.get(channel)
+        if version is None:
+            return None
+        base = self._candidate(thread_id, checkpoint_ns, channel, version)
+        if base is None or base[2] + 1 < self.snapshot_every:
+            return base
+        # Many forks of one deep checkpoint would otherwise each store a full snapshot
+        while (blob := self.blobs.get((thread_id, checkpoint_ns, channel, version))) is not None and blob[0] == DELTA:
+            version = blob[1][0]
+        return self._candidate(thread_id, checkpoint_ns, channel, version)
+
+    def _encode(self, thread_id: str, checkpoint_ns: str, channel: str, version, value, parent_versions: dict):
+        if not isinstance(value, list):
+            return self.serde.dumps_typed(value)
+
+        depth = 0
+        blob = None
+        base = self._base(thread_id, checkpoint_ns, channel, parent_versions)
+        if base is not None:
+            base_version, base_value, base_depth = base
+            start, stop = _splice(base_value, value)
+            items = value[start:len(value) - len(base_value) + stop]
+            # Worth it only if something is shared with the base
+            if base_depth + 1 < self.snapshot_every and len(items) < len(value):
+                depth = base_depth + 1
+                where = (thread_id, checkpoint_ns, channel)
+                blob = (DELTA, (base_version, depth, start, stop, self.serde.dumps_typed(items), where))
+        if blob is None:
+            blob = self.serde.dumps_typed(value)
+        self._remember((thread_id, checkpoint_ns, channel, version), value, depth)
+        return blob
+
+    def _parent_versions(self, thread_id: str, checkpoint_ns: str, parent_id: Optional[str]) -> dict:
+        saved = self.storage[thread_id][checkpoint_ns].get(parent_id) if parent_id else None
+        return self.serde.loads_typed(saved[0])["channel_versions"] if saved else {}
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_versions = self._parent_versions(thread_id, checkpoint_ns, config["configurable"].get("checkpoint_id"))
+        values = checkpoint["channel_values"]
+        encoded = {
+            k: self._encode(thread_id, checkpoint_ns, k, v, values[k], parent_versions)
+            for k, v in new_versions.items()
+            if k in values
+        }
+        # Let MemorySaver store the checkpoint itself, then swap in the encoded blobs
+        stripped = {**checkpoint, "channel_values": {k: v for k, v in values.items() if k not in encoded}}
+        next_config = super().put(config, stripped, metadata, new_versions)
+        for k, blob in encoded.items():
+            self.blobs[(thread_id, checkpoint_ns, k, new_versions[k])] = blob
+        return next_config
+
+    def pinned_versions(self, thread_id: str, checkpoint_ns: str) -> set[tuple[str, Any]]:
+        """(channel, version) blobs the next put may use as a delta base; they must not be deleted."""
+        return {(k[2], k[3]) for k in list(self._recent) if k[:2] == (thread_id, checkpoint_ns)}
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        for key in [k for k in self._recent if k[0] == thread_id]:
+            del self._recent[key]
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    def get_tuple(self, config):
+        saved = super().get_tuple(config)
+        if saved is not None:
+            # A fork or resume from this checkpoint splices against the same objects
+            thread_id = saved.config["configurable"]["thread_id"]
+            checkpoint_ns = saved.config["configurable"]["checkpoint_ns"]
+            versions = saved.checkpoint["channel_versions"]
+            for k, value in saved.checkpoint["channel_values"].items():
+                blob = self.blobs.get((thread_id, checkpoint_ns, k, versions.get(k)))
+                if isinstance(value, list) and blob is not None:
+                    self._remember((thread_id, checkpoint_ns, k, versions[k]), value, blob[1][1] if blob[0] == DELTA else 0)
+        return saved
+
+    def stored_bytes(self) -> int:
+        """Serialized size of all channel values held, deltas included."""
+        return sum(len(b[1][4][1]) if b[0] == DELTA else len(b[1]) for b in self.blobs.values())
@@ -0,0 +1,363 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from graph_constants import INTERRUPT
+
+# 🗄️ Append-only file checkpointer
+# A single-node alternative to Mongo that survives restarts. Every put/put_writes
+# appends records to one log file; an in-memory index maps checkpoint ids, channel
+# blobs and pending writes to their offsets. Reads go through mmap and touch only
+# the records of the requested checkpoint, so resuming a thread costs O(that
+# thread's data), not O(file). On open the log is replayed to rebuild the index,
+# and a torn record at the tail (crash mid-append) is truncated away.
+#
+# Record = header (payload length, crc32, kind) + payload (serde-encoded list).
+#   BLOB        thread, ns, channel, version, typed value
+#   CHECKPOINT  thread, ns, checkpoint id, parent id, typed checkpoint, typed metadata
+#   WRITE       thread, ns, checkpoint id, task id, task path, idx, channel, typed value
+#   DELETE      thread                                  (delete_thread)
+#   DROP        thread, ns, [dropped ids], {id: parent} (retention; see retention.py)
+# Dropped data stays in the file until `vacuum()` rewrites it with live records only.
+
+MAGIC = b"LGCKLOG1"
+HEADER = struct.Struct("<IIB")
+BLOB, CHECKPOINT, WRITE, DELETE, DROP = range(1, 6)
+
+
+class FileSaver(BaseCheckpointSaver[str]):
+    """Checkpointer backed by an append-only log file with mmap reads."""
+
+    get_next_version = InMemorySaver.get_next_version  # random suffix keeps fork versions distinct
+
+    def __init__(self, path: str, *, fsync: bool = False, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._open()
+
+    # ---------------------------
+    # Log file
+    # ---------------------------
+    def _open(self):
+        self._checkpoints: dict[tuple[str, str], dict[str, tuple[int, Optional[str]]]] = {}
+        self._blobs: dict[tuple[str, str, str, Any], int] = {}
+        self._writes: dict[tuple[str, str, str], dict[tuple[str, int], tuple[int, str]]] = {}
+        self._mm: Optional[mmap.mmap] = None
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._fd).st_size == 0:
+            os.write(self._fd, MAGIC)
+        self._size = self._replay()
+        os.ftruncate(self._fd, self._size)  # drop a torn tail left by a crash
+        os.lseek(self._fd, self._size, os.SEEK_SET)
+
+    def _view(self) -> mmap.mmap:
+        if self._mm is None or len(self._mm) < self._size:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._fd, self._size, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _replay(self) -> int:
+        """Rebuild the index from the log; returns the offset just past the last intact record."""
+        size = os.fstat(self._fd).st_size
+        self._size = size
+        view = self._view()
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a checkpoint log")
+        offset = len(MAGIC)
+        while offset + HEADER.size <= size:
+            length, crc, kind = HEADER.unpack_from(view, offset)
+            end = offset + HEADER.size + length
+            if end > size or zlib.crc32(view[offset + HEADER.size:end]) != crc:
+                break
+            self._index(kind, self._decode(view, offset), offset)
+            offset = end
+        self._mm.close()
+        self._mm = None
+        return offset
+
+    def _encode(self, kind: int, record: list) -> bytes:
+        type_, data = self.serde.dumps_typed(record)
+        payload = bytes([len(type_)]) + type_.encode() + data
+        return HEADER.pack(len(payload), zlib.crc32(payload), kind) + payload
+
+    def _decode(self, view, offset: int) -> list:
+        length, _, _ = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        n = view[start]
+        type_ = bytes(view[start + 1:start + 1 + n]).decode()
+        return self.serde.loads_typed((type_, bytes(view[start + 1 + n:start + length])))
+
+    def _read(self, offset: int) -> list:
+        with self._lock:
+            return self._decode(self._view(), offset)
+
+    def _append(self, records: list[tuple[int, list]]):
+        """Write `records` with one write call, then index them."""
+        encoded = [self._encode(kind, record) for kind, record in records]
+        with self._lock:
+            offset = self._size
+            pending = memoryview(b"".join(encoded))
+            while pending:
+                pending = pending[os.write(self._fd, pending):]
+            if self.fsync:
+                os.fsync(self._fd)
+            for (kind, record), data in zip(records, encoded):
+                self._index(kind, record, offset)
+                offset += len(data)
+            self._size = offset
+
+    def _index(self, kind: int, record: list, offset: int):
+        if kind == BLOB:
+            thread_id, ns, channel, version = record[:4]
+            self._blobs[(thread_id, ns, channel, version)] = offset
+        elif kind == CHECKPOINT:
+            thread_id, ns, checkpoint_id, parent_id = record[:4]
+            self._checkpoints.setdefault((thread_id, ns), {})[checkpoint_id] = (offset, parent_id)
+        elif kind == WRITE:
+            thread_id, ns, checkpoint_id, task_id, task_path, idx = record[:6]
+            self._writes.setdefault((thread_id, ns, checkpoint_id), {})[(task_id, idx)] = (offset, task_path)
+        elif kind == DELETE:
+            self._forget_thread(record[0])
+        elif kind == DROP:
+            thread_id, ns, dropped, relinked = record
+            self._forget_checkpoints(thread_id, ns, dropped, relinked)
+
+    def _forget_thread(self, thread_id: str):
+        for index in (self._checkpoints, self._blobs, self._writes):
+            for key in [k for k in index if k[0] == thread_id]:
+                del index[key]
+
+    def _forget_checkpoints(self, thread_id: str, ns: str, dropped: list[str], relinked: dict):
+        checkpoints = self._checkpoints.get((thread_id, ns), {})
+        for checkpoint_id in dropped:
+            checkpoints.pop(checkpoint_id, None)
+            self._writes.pop((thread_id, ns, checkpoint_id), None)
+        for checkpoint_id, parent_id in relinked.items():
+            if checkpoint_id in checkpoints:
+                checkpoints[checkpoint_id] = (checkpoints[checkpoint_id][0], parent_id)
+        # Blobs no surviving checkpoint points at
+        referenced = set()
+        for offset, _ in checkpoints.values():
+            checkpoint = self.serde.loads_typed(self._read(offset)[4])
+            referenced.update(checkpoint["channel_versions"].items())
+        for key in [k for k in self._blobs if k[:2] == (thread_id, ns) and k[2:] not in referenced]:
+            del self._blobs[key]
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------
+    # Checkpointer API
+    # ---------------------------
+    def _tuple(self, thread_id: str, ns: str, checkpoint_id: str, offset: int, parent_id) -> CheckpointTuple:
+        record = self._read(offset)
+        checkpoint = self.serde.loads_typed(record[4])
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._blobs.get((thread_id, ns, channel, version))
+            if blob is not None:
+                values[channel] = self.serde.loads_typed(self._read(blob)[4])
+        writes = self._writes.get((thread_id, ns, checkpoint_id), {})
+        pending = []
+        for (task_id, idx), (write_offset, task_path) in sorted(
+            writes.items(), key=lambda w: writes_sort_key(w[1][1], *w[0])
+        ):
+            channel, value = self._read(write_offset)[6:8]
+            pending.append((task_id, channel, self.serde.loads_typed(value)))
+        base = {"thread_id": thread_id, "checkpoint_ns": ns}
+        return CheckpointTuple(
+            config={"configurable": {**base, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed(record[5]),
+            parent_config={"configurable": {**base, "checkpoint_id": parent_id}} if parent_id else None,
+            pending_writes=pending,
+        )
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            checkpoints = self._checkpoints.get((thread_id, ns))
+            if not checkpoints:
+                return None
+            checkpoint_id = get_checkpoint_id(config) or max(checkpoints)
+            entry = checkpoints.get(checkpoint_id)
+        if entry is None:
+            return None
+        return self._tuple(thread_id, ns, checkpoint_id, *entry)
+
+    def latest_version(self, config) -> Optional[tuple[str, bool]]:
+        """(newest checkpoint id, whether it has pending writes) for the thread, from the index alone."""
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            checkpoints = self._checkpoints.get((thread_id, ns))
+            if not checkpoints:
+                return None
+            checkpoint_id = max(checkpoints)
+            return checkpoint_id, bool(self._writes.get((thread_id, ns, checkpoint_id)))
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            keys = list(self._checkpoints)
+        if config is not None:
+            keys = [k for k in keys if k[0] == config["configurable"]["thread_id"]]
+            if "checkpoint_ns" in config["configurable"]:
+                keys = [k for k in keys if k[1] == config["configurable"]["checkpoint_ns"]]
+        wanted_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+        for thread_id, ns in keys:
+            with self._lock:
+                entries = sorted(self._checkpoints.get((thread_id, ns), {}).items(), reverse=True)
+            for checkpoint_id, entry in entries:
+                if wanted_id and checkpoint_id != wanted_id:
+                    continue
+                if before_id and checkpoint_id >= before_id:
+                    continue
+                if filter:
+                    metadata = self.serde.loads_typed(self._read(entry[0])[5])
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                if limit is not None and limit <= 0:
+                    return
+                if limit is not None:
+                    limit -= 1
+                yield self._tuple(thread_id, ns, checkpoint_id, *entry)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint = dict(checkpoint)
+        values = checkpoint.pop("channel_values")
+        records = [
+            (BLOB, [thread_id, ns, channel, version, list(self.serde.dumps_typed(values[channel]))])
+            for channel, version in new_versions.items()
+            if channel in values
+        ]
+        records.append((CHECKPOINT, [
+            thread_id,
+            ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            list(self.serde.dumps_typed(checkpoint)),
+            list(self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))),
+        ]))
+        self._append(records)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            existing = self._writes.get((thread_id, ns, checkpoint_id), {})
+        records = []
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            if idx >= 0 and (task_id, idx) in existing:
+                continue  # regular writes are idempotent; special ones (errors, interrupts) overwrite
+            records.append((WRITE, [
+                thread_id, ns, checkpoint_id, task_id, task_path, idx, channel, list(self.serde.dumps_typed(value)),
+            ]))
+        if records:
+            self._append(records)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._append([(DELETE, [thread_id])])
+
+    # ---------------------------
+    # Retention support
+    # ---------------------------
+    def thread_namespaces(self) -> "list[tuple[str, str]]":
+        with self._lock:
+            return list(self._checkpoints)
+
+    def checkpoint_entries(self, thread_id: str, ns: str) -> "list[tuple[str, Optional[str], dict, bool]]":
+        """(checkpoint id, parent id, metadata, paused on an interrupt) for one thread namespace."""
+        with self._lock:
+            checkpoints = dict(self._checkpoints.get((thread_id, ns), {}))
+            writes = {cid: list(self._writes.get((thread_id, ns, cid), {})) for cid in checkpoints}
+        return [
+            (
+                checkpoint_id,
+                parent_id,
+                self.serde.loads_typed(self._read(offset)[5]),
+                any(idx == WRITES_IDX_MAP[INTERRUPT] for _, idx in writes[checkpoint_id]),
+            )
+            for checkpoint_id, (offset, parent_id) in checkpoints.items()
+        ]
+
+    def drop_checkpoints(self, thread_id: str, ns: str, dropped: "list[str]", relinked: dict[str, Optional[str]]):
+        """Remove checkpoints (and re-link survivors' parents); recorded in the log so it survives restarts."""
+        self._append([(DROP, [thread_id, ns, list(dropped), dict(relinked)])])
+
+    def vacuum(self):
+        """Rewrite the log with only live records, reclaiming space from dropped and deleted data."""
+        with self._lock:
+            tmp = self.path + ".vacuum"
+            if os.path.exists(tmp):
+                os.remove(tmp)  # left over from an interrupted vacuum
+            compacted = FileSaver(tmp, serde=self.serde)
+            records = []
+            for offset in sorted(self._blobs.values()):
+                records.append((BLOB, self._read(offset)))
+            for (thread_id, ns), checkpoints in self._checkpoints.items():
+                for checkpoint_id, (offset, parent_id) in checkpoints.items():
+                    record = self._read(offset)
+                    record[3] = parent_id  # apply re-links
+                    records.append((CHECKPOINT, record))
+            for writes in self._writes.values():
+                for offset, _ in writes.values():
+                    records.append((WRITE, self._read(offset)))
+            compacted._append(records)
+            os.fsync(compacted._fd)
+            compacted.close()
+            self.close()
+            os.replace(tmp, self.path)
+            self._open()
+
+    # ---------------------------
+    # Async variants
+    # ---------------------------
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return self.delete_thread(thread_id)
@@ -0,0 +1,7 @@
+# 🏷️ LangGraph names shared by the helpers
+# The channel LangGraph writes interrupts to, in checkpoints' pending writes and in
+# the "__interrupt__" key of stream chunks and invoke results. It is part of the
+# stored data and of LangGraph's output, so it is spelled out here rather than
+# imported from `langgraph.constants`, where it is private (deprecated since 1.0).
+
+INTERRUPT = "__interrupt__"
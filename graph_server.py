@@ -0,0 +1,254 @@
+import asyncio
+import json
+from collections import deque
+from typing import Any, Sequence
+from urllib.parse import parse_qs
+
+from state_patch import astream_modes
+
+# 🌐 Serving a compiled graph over SSE and WebSocket
+# `create_app(graph)` returns a plain ASGI app (run it with uvicorn, hypercorn, ...):
+#
+#   POST /threads/{thread_id}/stream   body {"input": {...}, "stream_mode": [...]}  -> SSE
+#   GET  /threads/{thread_id}/stream?input=<json>&stream_mode=updates&...          -> SSE (EventSource)
+#   GET  /threads/{thread_id}/state                                                  -> JSON values
+#   WS   /threads/{thread_id}/ws       send {"input": ..., "stream_mode": [...]} per run,
+#                                      {"cancel": true} to stop the current one
+#
+# Every event is `(mode, payload)` from `astream_modes`, so "patches" works next to the
+# native modes; SSE sends it as `event: <mode>`, WebSocket as {"mode": ..., "data": ...}.
+# A run ends with an "end" event, or "error" with the message. "input": null resumes
+# an interrupted thread.
+#
+# Each connection has a bounded queue (`queue_size` events) between the graph run and
+# the socket. When a client reads slowly the queue fills, the run stops being pulled
+# and the graph does not start its next step until there is room again; LangGraph
+# still buffers what the current step emits (e.g. one model call's tokens). When the
+# client disconnects (or sends cancel) the run task is cancelled, which cancels the
+# running async node; a sync node running in a worker thread finishes its call first.
+# Runs on the same thread_id are serialized. With a `BackgroundSummarizer`, a run also
+# holds its thread lock and schedules the summary afterwards, like `summarizer.turn`.
+
+_END = object()
+
+
+async def _acquire(lock):
+    """Take a threading lock without blocking the event loop (and without leaking it on cancel)."""
+    acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        acquiring.add_done_callback(lambda _: lock.release())
+        raise
+
+
+def _json(value) -> str:
+    def default(o):
+        if hasattr(o, "model_dump"):
+            return o.model_dump()  # messages
+        return str(o)
+
+    return json.dumps(value, default=default)
+
+
+def _parse_request(raw) -> dict:
+    """A run request from JSON text; ValueError unless it is a JSON object."""
+    request = json.loads(raw)  # JSONDecodeError is a ValueError
+    if not isinstance(request, dict):
+        raise ValueError(f"expected a JSON object, got {type(request).__name__}")
+    return request
+
+
+class GraphApp:
+    """ASGI app streaming a compiled graph's runs per thread_id."""
+
+    def __init__(self, graph, *, stream_mode: Sequence[str] = ("updates",), queue_size: int = 64, summarizer=None):
+        self.graph = graph
+        self.stream_mode = list(stream_mode)
+        self.queue_size = queue_size
+        self.summarizer = summarizer
+        self.active = 0  # runs streaming right now
+        self.completed = 0
+        self.cancelled = 0  # runs stopped by a disconnect or cancel request
+        self._thread_locks: dict[str, asyncio.Lock] = {}
+
+    # ---------------------------
+    # Runs
+    # ---------------------------
+    async def _stream(self, thread_id: str, request: dict, queue: asyncio.Queue):
+        config = {"configurable": {"thread_id": thread_id}}
+        modes = request.get("stream_mode") or self.stream_mode
+        modes = [modes] if isinstance(modes, str) else modes
+        lock = self._thread_locks.setdefault(thread_id, asyncio.Lock())
+        async with lock:
+            summary_lock = self.summarizer.lock(config) if self.summarizer is not None else None
+            if summary_lock is not None:
+                await _acquire(summary_lock)
+            try:
+                async for mode, payload in astream_modes(self.graph, request.get("input"), config, modes):
+                    await queue.put((mode, payload))  # blocks while the client is behind
+                await queue.put(("end", {"thread_id": thread_id}))
+            finally:
+                if summary_lock is not None:
+                    summary_lock.release()
+                    self.summarizer.schedule(config)
+
+    async def _produce(self, thread_id: str, request: dict, queue: asyncio.Queue):
+        cancelled = False
+        try:
+            await self._stream(thread_id, request, queue)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            await queue.put(("error", {"message": str(e)}))
+        finally:
+            if not cancelled:  # a cancelled run's consumer is cancelled too; nobody waits for the end
+                await queue.put(_END)
+
+    async def _run(self, thread_id: str, request: dict, send_event, stop) -> bool:
+        """Stream one run through `send_event(mode, payload)` until it ends or `stop()` returns; True if completed."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        async def consume():
+            while (item := await queue.get()) is not _END:
+                await send_event(*item)
+
+        producer = asyncio.create_task(self._produce(thread_id, request, queue))
+        consumer = asyncio.create_task(consume())
+        watcher = asyncio.create_task(stop())
+        self.active += 1
+        try:
+            await asyncio.wait({consumer, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            completed = consumer.done() and consumer.exception() is None
+        finally:
+            self.active -= 1
+            for task in (producer, consumer, watcher):
+                task.cancel()
+            await asyncio.gather(producer, consumer, watcher, return_exceptions=True)
+        if completed:
+            self.completed += 1
+        else:
+            self.cancelled += 1
+        return completed
+
+    # ---------------------------
+    # ASGI
+    # ---------------------------
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        parts = scope["path"].strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "threads":
+            return await self._respond(scope, send, 404, {"error": "not found"})
+        thread_id, action = parts[1], parts[2]
+        if scope["type"] == "websocket" and action == "ws":
+            return await self._websocket(thread_id, receive, send)
+        if scope["type"] == "http" and action == "stream" and scope["method"] in ("GET", "POST"):
+            return await self._sse(scope, thread_id, receive, send)
+        if scope["type"] == "http" and action == "state" and scope["method"] == "GET":
+            config = {"configurable": {"thread_id": thread_id}}
+            state = await self.graph.aget_state(config)
+            return await self._respond(scope, send, 200, {"values": state.values, "next": list(state.next)})
+        return await self._respond(scope, send, 404, {"error": "not found"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _respond(self, scope, send, status: int, body: Any):
+        if scope["type"] == "websocket":
+            return await send({"type": "websocket.close", "code": 4404 if status == 404 else 1011})
+        data = _json(body).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    async def _sse(self, scope, thread_id: str, receive, send):
+        if scope["method"] == "POST":
+            body = b""
+            while True:
+                message = await receive()
+                body += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+            try:
+                request = _parse_request(body or b"{}")
+            except ValueError as e:
+                return await self._respond(scope, send, 400, {"error": str(e)})
+        else:
+            query = parse_qs(scope.get("query_string", b"").decode())
+            try:
+                request = {"input": json.loads(query["input"][0]) if "input" in query else None}
+            except ValueError as e:
+                return await self._respond(scope, send, 400, {"error": f"input: {e}"})
+            if "stream_mode" in query:
+                request["stream_mode"] = query["stream_mode"]
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+
+        async def send_event(mode, payload):
+            chunk = f"event: {mode}\ndata: {_json(payload)}\n\n".encode()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        if await self._run(thread_id, request, send_event, disconnected):
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _websocket(self, thread_id: str, receive, send):
+        if (await receive())["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+
+        async def send_event(mode, payload):
+            await send({"type": "websocket.send", "text": _json({"mode": mode, "data": payload})})
+
+        pending = deque()  # messages that arrived while a run was streaming
+
+        async def stopped():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.receive" and '"cancel"' in (message.get("text") or ""):
+                    try:
+                        cancel = _parse_request(message["text"]).get("cancel")
+                    except ValueError:
+                        cancel = False  # answered with an error once the run is over
+                    if cancel:
+                        await send_event("cancelled", {"thread_id": thread_id})
+                        return
+                pending.append(message)
+                if message["type"] == "websocket.disconnect":
+                    return
+
+        while True:
+            message = pending.popleft() if pending else await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                request = _parse_request(message.get("text") or message.get("bytes") or b"{}")
+            except ValueError as e:
+                await send_event("error", {"message": str(e)})
+                continue
+            if request.get("cancel"):
+                continue  # nothing running
+            await self._run(thread_id, request, send_event, stopped)
+
+
+def create_app(graph, *, stream_mode: Sequence[str] = ("updates",), queue_size: int = 64, summarizer=None) -> GraphApp:
+    """ASGI app exposing `graph` over SSE and WebSocket; see the module comment for the routes."""
+    return GraphApp(graph, stream_mode=stream_mode, queue_size=queue_size, summarizer=summarizer)
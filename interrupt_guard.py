@@ -0,0 +1,120 @@
+import functools
+from typing import Any, Callable, Iterator, Optional, Sequence, Union
+
+from langgraph.types import interrupt
+
+from graph_constants import INTERRUPT
+
+# 🚧 Interrupt conditions declared up front
+# A node that raises an interrupt when its input is bad gets re-run on every retry:
+# `graph.stream(None, thread)` executes it, interrupts again and writes the interrupt
+# again, even though nothing changed. With `InterruptGuard` the condition is a
+# predicate attached to the node, together with the channels it depends on:
+#
+#   guard = InterruptGuard()
+#
+#   @guard.when(lambda state: len(state["input"]) > 5, watch=["input"],
+#               message=lambda state: f"Input too long: {state['input']}")
+#   def step_2(state): ...
+#
+# Inside the graph the predicate is checked before the node body runs. Retries go
+# through `guard.stream(graph, None, thread)` / `guard.invoke(...)`, which look at the
+# thread's state first (`graph.get_state`, a read): if it is interrupted before a
+# guarded node whose watched channels have the same values as when the predicate
+# last held, or whose predicate still holds, the interrupt is reported again without
+# running anything and without writing a checkpoint. Once the state is edited (`update_state`) the predicate is
+# re-evaluated, and the run continues if it no longer holds. Resuming with
+# `Command(resume=...)` goes past the guard as with any `interrupt()`.
+
+
+class _Guard:
+    def __init__(self, predicate: Callable[[Any], bool], watch: Sequence[str], message: Callable[[Any], Any]):
+        self.predicate = predicate
+        self.watch = tuple(watch)
+        self.message = message
+
+
+class InterruptGuard:
+    """Node interrupt predicates that retries can check from the checkpoint, without running the node."""
+
+    def __init__(self):
+        self.skipped = 0  # retries answered from the checkpoint
+        self._guards: dict[str, _Guard] = {}
+        # (thread, ns, node) -> (watched channel values, interrupts) when the predicate last held
+        self._held: dict[tuple[str, str, str], tuple[tuple, Any]] = {}
+
+    def when(
+        self,
+        predicate: Callable[[Any], bool],
+        watch: Sequence[str],
+        message: Union[str, Callable[[Any], Any], None] = None,
+        node: Optional[str] = None,
+    ):
+        """Decorate a node: interrupt with `message` instead of running it while `predicate(state)` holds."""
+        def decorator(func):
+            text = message if callable(message) else (lambda state: message or f"{node or func.__name__} is guarded")
+            guard = _Guard(predicate, watch, text)
+            self._guards[node or func.__name__] = guard
+
+            @functools.wraps(func)  # keeps the signature LangGraph inspects for a `config` parameter
+            def guarded(state, *args, **kwargs):
+                if guard.predicate(state):
+                    interrupt(guard.message(state))
+                return func(state, *args, **kwargs)
+
+            return guarded
+        return decorator
+
+    # ---------------------------
+    # Retries
+    # ---------------------------
+    def _still_interrupted(self, graph, config) -> Optional[tuple[dict, Any]]:
+        """(state values, interrupts) if the thread would interrupt again unchanged, else None."""
+        state = graph.get_state(config)
+        if not state.next:
+            return None
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        values = state.values
+
+        for task in state.tasks:
+            guard = self._guards.get(task.name)
+            if guard is None:
+                continue
+            key = (thread_id, checkpoint_ns, task.name)
+            watched = tuple(values.get(ch) for ch in guard.watch)
+            held = self._held.get(key)
+            if held is not None and held[0] == watched:
+                return values, held[1]
+            if task.interrupts and guard.predicate(values):
+                self._held[key] = (watched, task.interrupts)
+                return values, task.interrupts
+            self._held.pop(key, None)
+        return None
+
+    def stream(self, graph, input, config, *, stream_mode="values", **kwargs) -> Iterator[Any]:
+        """`graph.stream`, except that a retry (input None) of an unchanged guarded interrupt runs nothing."""
+        still = self._still_interrupted(graph, config) if input is None else None
+        if still is None:
+            yield from graph.stream(input, config, stream_mode=stream_mode, **kwargs)
+            return
+        self.skipped += 1
+        values, interrupts = still
+        modes = [stream_mode] if isinstance(stream_mode, str) else stream_mode
+        for mode in modes:
+            if mode == "values":
+                events = [values, {**values, INTERRUPT: interrupts}]
+            elif mode == "updates":
+                events = [{INTERRUPT: interrupts}]
+            else:
+                continue
+            for event in events:
+                yield event if isinstance(stream_mode, str) else (mode, event)
+
+    def invoke(self, graph, input, config, **kwargs):
+        still = self._still_interrupted(graph, config) if input is None else None
+        if still is None:
+            return graph.invoke(input, config, **kwargs)
+        self.skipped += 1
+        values, interrupts = still
+        return {**values, INTERRUPT: list(interrupts)}
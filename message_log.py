@@ -0,0 +1,320 @@
+import uuid
+from collections.abc import Sequence
+from itertools import islice
+from typing import Any
+
+from langchain_core.messages import BaseMessage, RemoveMessage, convert_to_messages, message_chunk_to_message
+from langgraph.channels.base import BaseChannel
+
+try:
+    from langgraph.graph.message import REMOVE_ALL_MESSAGES
+except ImportError:  # older langgraph releases
+    REMOVE_ALL_MESSAGES = "__remove_all__"
+
+# 📇 Indexed message store
+# `add_messages` rebuilds an id -> position map of the whole history on every merge,
+# so a long thread receiving many small updates costs O(history) per update.
+# `MessageLog` keeps that index alive between merges. Removed messages leave a
+# tombstone (None) in place so positions stay valid, and the log is compacted once
+# tombstones outnumber live messages. Append, replace-by-id and remove-by-id are
+# therefore amortized O(1).
+#
+# As a graph channel, every step hands the state to nodes and then applies their
+# writes. Readers get a frozen view of the log as it was, sharing its list and index:
+# appends after a read still cost O(1), and only replacing or removing a message a
+# reader can see copies the log first (a flat C-level list/dict copy). A conditional
+# edge reads a fresh copy of the state with the node's writes applied, which also
+# costs one flat copy. With a checkpointer every step still serializes the whole list.
+#
+# Use it as a drop-in channel for the messages key:
+#
+#   class State(TypedDict):
+#       messages: Annotated[list[AnyMessage], IndexedMessages]
+
+
+class MessageLog(Sequence):
+    """Ordered messages with an id -> slot index; reads like a list of the live messages."""
+
+    __slots__ = ("_slots", "_index", "_dead", "_frozen")
+
+    def __init__(self, messages: Sequence[BaseMessage] = ()):
+        self._slots: list[BaseMessage | None] = []
+        self._index: dict[str, int] = {}
+        self._dead = 0
+        self._frozen = 0  # slots below this are visible through a view and must not change in place
+        for m in messages:
+            self._put(m)
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    def _put(self, message: BaseMessage):
+        if message.id is None:
+            message = message.model_copy(update={"id": str(uuid.uuid4())})
+        slot = self._index.get(message.id)
+        if slot is None:
+            self._index[message.id] = len(self._slots)
+            self._slots.append(message)
+        else:
+            if slot < self._frozen:
+                self._detach()
+            self._slots[slot] = message  # replace in place, keeping the original position
+
+    def _remove(self, message_id: str):
+        slot = self._index.get(message_id)
+        if slot is None:
+            raise ValueError(f"Attempting to delete a message with an ID that doesn't exist ('{message_id}')")
+        if slot < self._frozen:
+            self._detach()
+        del self._index[message_id]
+        self._slots[slot] = None
+        self._dead += 1
+        if self._dead > max(32, len(self._index)):
+            self.compact()
+
+    def _detach(self):
+        """Stop sharing the list and index with the views handed out so far."""
+        self._slots = list(self._slots)
+        self._index = dict(self._index)
+        self._frozen = 0
+
+    def clear(self):
+        self._slots = []
+        self._index = {}
+        self._dead = 0
+        self._frozen = 0
+
+    def merge(self, update) -> "MessageLog":
+        """Apply an `add_messages`-style update (message, list of messages, RemoveMessage) in place.
+
+        As in `add_messages`, removals apply at the end of the update, and re-adding a
+        message the same update removes cancels the removal (the message keeps its place).
+        """
+        if not isinstance(update, list):
+            update = [update]
+        messages = [message_chunk_to_message(m) for m in convert_to_messages(update)]
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], RemoveMessage) and messages[i].id == REMOVE_ALL_MESSAGES:
+                # add_messages keeps what follows the last "remove all" as it is
+                self.clear()
+                for m in messages[i + 1:]:
+                    self._put(m)
+                return self
+        added = set()
+        for m in messages:  # fail before changing anything, like add_messages
+            if not isinstance(m, RemoveMessage):
+                added.add(m.id)
+            elif m.id not in self._index and m.id not in added:
+                raise ValueError(f"Attempting to delete a message with an ID that doesn't exist ('{m.id}')")
+        removed = set()
+        for m in messages:
+            if isinstance(m, RemoveMessage):
+                removed.add(m.id)
+            else:
+                removed.discard(m.id)
+                self._put(m)
+        for message_id in removed:
+            self._remove(message_id)
+        return self
+
+    def compact(self):
+        """Drop tombstones and renumber the index; O(n), but only after O(n) removals."""
+        self._slots = [m for m in self._slots if m is not None]
+        self._index = {m.id: i for i, m in enumerate(self._slots)}
+        self._dead = 0
+        self._frozen = 0
+
+    def copy(self) -> "MessageLog":
+        new = MessageLog.__new__(MessageLog)
+        new._slots = list(self._slots)
+        new._index = dict(self._index)
+        new._dead = self._dead
+        new._frozen = 0
+        return new
+
+    def view(self) -> "MessageLog":
+        """Read-only snapshot of the current messages, in O(1); later writes to this log don't show."""
+        self._frozen = len(self._slots)
+        return _FrozenLog(self)
+
+    # ---------------------------
+    # Reads (list-like view over the live messages)
+    # ---------------------------
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self):
+        return (m for m in self._slots if m is not None)
+
+    def __getitem__(self, i):
+        if self._dead == 0:
+            return self._slots[i]
+        if isinstance(i, int) and -8 <= i < 8:
+            # Cheap path for state["messages"][-1] and friends: walk past a few tombstones
+            step, start = (1, 0) if i >= 0 else (-1, len(self._slots) - 1)
+            want = i if i >= 0 else -i - 1
+            for slot in range(start, -1 if step < 0 else len(self._slots), step):
+                m = self._slots[slot]
+                if m is not None:
+                    if want == 0:
+                        return m
+                    want -= 1
+            raise IndexError("message index out of range")
+        self.compact()
+        return self._slots[i]
+
+    def get(self, message_id: str) -> BaseMessage | None:
+        slot = self._index.get(message_id)
+        return None if slot is None else self._slots[slot]
+
+    def __contains__(self, message) -> bool:
+        return getattr(message, "id", None) in self._index
+
+    def to_list(self) -> list[BaseMessage]:
+        return [m for m in self._slots if m is not None]
+
+    def __add__(self, other):
+        return self.to_list() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.to_list()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (MessageLog, list)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MessageLog({self.to_list()!r})"
+
+
+class _FrozenLog(MessageLog):
+    """A log's messages as they were when `view()` was called; shares its list and index."""
+
+    __slots__ = ("_end", "_len")
+
+    def __init__(self, log: MessageLog):
+        self._slots, self._index, self._dead = log._slots, log._index, log._dead
+        self._frozen = self._end = len(log._slots)
+        self._len = len(log._index)
+
+    def _visible(self, slot) -> bool:
+        return slot is not None and slot < self._end
+
+    def merge(self, update):
+        raise TypeError("a MessageLog view is read-only; copy() it first")
+
+    def compact(self):
+        pass  # the slots are shared with the log; reads below handle tombstones
+
+    def copy(self) -> MessageLog:
+        new = MessageLog.__new__(MessageLog)
+        new._slots = self._slots[:self._end]
+        # The log only adds index entries past the view (anything else detaches it first)
+        if len(self._index) == self._len:
+            new._index = dict(self._index)
+        else:
+            new._index = {k: slot for k, slot in self._index.items() if slot < self._end}
+        new._dead = self._dead
+        new._frozen = 0
+        return new
+
+    def view(self) -> MessageLog:
+        return self
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        return (m for m in islice(self._slots, self._end) if m is not None)
+
+    def __getitem__(self, i):
+        if isinstance(i, int) and (self._dead == 0 or -8 <= i < 8):
+            if self._dead == 0:
+                j = i + self._end if i < 0 else i
+                if not 0 <= j < self._end:
+                    raise IndexError("message index out of range")
+                return self._slots[j]
+            step, start, stop = (1, 0, self._end) if i >= 0 else (-1, self._end - 1, -1)
+            want = i if i >= 0 else -i - 1
+            for slot in range(start, stop, step):
+                m = self._slots[slot]
+                if m is not None:
+                    if want == 0:
+                        return m
+                    want -= 1
+            raise IndexError("message index out of range")
+        return self.to_list()[i]
+
+    def get(self, message_id: str) -> BaseMessage | None:
+        slot = self._index.get(message_id)
+        return self._slots[slot] if self._visible(slot) else None
+
+    def __contains__(self, message) -> bool:
+        return self._visible(self._index.get(getattr(message, "id", None)))
+
+    def to_list(self) -> list[BaseMessage]:
+        return list(iter(self))
+
+
+def add_messages_indexed(left, right) -> MessageLog:
+    """Reducer with `add_messages` semantics; updates `left` in place when it is already a MessageLog."""
+    if isinstance(left, _FrozenLog):
+        left = left.copy()
+    log = left if isinstance(left, MessageLog) else MessageLog(convert_to_messages(left or []))
+    return log.merge(right)
+
+
+class IndexedMessages(BaseChannel):
+    """Messages channel backed by a `MessageLog`; checkpoints as a plain list of messages.
+
+    Values handed out by `get()` (node inputs, streamed "values") are frozen views and
+    never change afterwards; see the module comment for what a write after a read costs.
+    """
+
+    __slots__ = ("log", "_view")
+
+    def __init__(self, typ: Any = list, key: str = ""):
+        super().__init__(typ, key)
+        self.log = MessageLog()
+        self._view = None  # the last view handed out, while no write has happened since
+
+    @property
+    def ValueType(self) -> Any:
+        return self.typ
+
+    @property
+    def UpdateType(self) -> Any:
+        return self.typ
+
+    def copy(self):
+        new = self.__class__(self.typ, self.key)
+        new.log = new._view = self.get()  # the copy materializes a log on its first write
+        return new
+
+    def from_checkpoint(self, checkpoint):
+        new = self.__class__(self.typ, self.key)
+        if isinstance(checkpoint, (list, MessageLog)):
+            new.log = MessageLog(checkpoint)
+        return new
+
+    def update(self, values) -> bool:
+        if not values:
+            return False
+        if isinstance(self.log, _FrozenLog):
+            self.log = self.log.copy()
+        self._view = None
+        for value in values:
+            self.log.merge(value)
+        return True
+
+    def get(self) -> MessageLog:
+        if self._view is None:
+            self._view = self.log.view()
+        return self._view
+
+    def is_available(self) -> bool:
+        return True
+
+    def checkpoint(self) -> list[BaseMessage]:
+        return self.log.to_list()
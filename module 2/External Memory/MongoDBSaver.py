@@ -1,29 +1,35 @@
 import os
+import sys
 import getpass
-from pymongo import MongoClient
-from langgraph.checkpoint.mongodb import MongoDBSaver
-from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import create_react_agent
 from typing import Literal, TypedDict
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from cassette import chat_model, replaying
+from tool_cache import cacheable
+from mongo_saver import BufferedMongoDBSaver
+from retention import RetentionPolicy, compact
 
 # Set OpenAI API Key
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
-# MongoDB Connection (Replace with your actual MongoDB URI)
-MONGODB_URI = "mongodb://localhost:27017/"
-mongodb_client = MongoClient(MONGODB_URI)
+# MongoDB Connection (Replace with your actual MongoDB URI, or "mongomock://" to run in-process)
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
 
 # Initialize MongoDB Checkpointer
-checkpointer = MongoDBSaver(mongodb_client)
+# Pooled client; checkpoint writes are batched and flushed every 64 upserts or 0.5 s,
+# and always before reads, dynamic interrupts and exit
+checkpointer = BufferedMongoDBSaver.from_uri(MONGODB_URI, max_pool_size=20, flush_size=64, flush_interval=0.5)
 
 # Define a Tool (Weather API Simulation)
 @tool
+@cacheable(ttl=600)  # weather changes, so entries expire after 10 minutes
 def get_weather(city: Literal["nyc", "sf"]):
     """Use this tool to get weather information for NYC or SF."""
     if city == "nyc":
@@ -35,7 +41,7 @@ def get_weather(city: Literal["nyc", "sf"]):
 
 # Define Tools & AI Model
 tools = [get_weather]
-model = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
+model = chat_model(model_name="gpt-4o-mini", temperature=0)
 
 # Define the State for the Agent
 class AgentMemory(TypedDict):
@@ -59,3 +65,24 @@ config = {"configurable": {"thread_id": "1"}}
 # User interacts with the agent
 response = graph.invoke({"messages": [("human", "What's the weather in SF?")]}, config)
 print(response)
+
+# Browse the thread's history a page at a time, without loading checkpoint payloads
+history, next_page = checkpointer.page(config, limit=5)
+for info in history:
+    print(info.metadata.get("step"), info.metadata.get("source"), info.config["configurable"]["checkpoint_id"])
+if next_page is not None:
+    print("More history before", next_page["configurable"]["checkpoint_id"])
+
+# The checkpoint just before the latest one: a single indexed lookup
+latest = checkpointer.get_tuple(config)
+previous = checkpointer.previous(latest.config)
+print("Previous checkpoint:", previous.config["configurable"]["checkpoint_id"] if previous else None)
+
+# Retention: keep each thread's last 20 checkpoints and anything from the past week
+# (interrupts and named fork points are always kept); the rest is squashed away
+removed = compact(checkpointer, RetentionPolicy(keep_last=20, max_age=7 * 24 * 3600))
+print("Checkpoints removed by retention:", removed)
+
+# Make sure every checkpoint is in MongoDB before exiting
+checkpointer.close()
+print(f"Checkpoint upserts: {checkpointer.flushed_ops} in {checkpointer.flushes} bulk writes")
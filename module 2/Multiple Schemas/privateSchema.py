@@ -1,5 +1,8 @@
+import os
+import sys
 from typing_extensions import TypedDict
-from IPython.display import Image, display
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
 from langgraph.graph import StateGraph, START, END
 
 # Define the main state schema (input/output of the graph)
@@ -36,7 +39,7 @@ builder.add_edge("node_2", END)  # Node 2 → End
 graph = builder.compile()
 
 # Display graph structure
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Invoke the graph with an initial state
 result = graph.invoke({"foo": 10})
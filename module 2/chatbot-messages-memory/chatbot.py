@@ -1,26 +1,35 @@
 import os, getpass
 from langgraph.graph import MessagesState, StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, RemoveMessage
-from IPython.display import Image, display
+from langchain_core.messages import SystemMessage
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from summary_memory import SummaryMemory
+from token_count import openai_token_counter
 
 # ✅ Set API keys (for OpenAI & LangChain)
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 # ✅ Initialize GPT-4o model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+model = chat_model(model="gpt-4o", temperature=0)
 
-# ✅ Define state with messages & summary
+# ✅ Define state with messages, summary & the ids already folded into the summary
 class State(MessagesState):
     summary: str
+    summarized_ids: list[str]
+
+# ✅ Summarize once unsummarized messages exceed ~300 tokens, keeping the last two
+summary_memory = SummaryMemory(model, openai_token_counter("gpt-4o"), max_tokens=300, keep_last=2)
 
 # ✅ Function to call GPT model
 def call_model(state: State):
@@ -35,38 +44,17 @@ def call_model(state: State):
     response = model.invoke(messages)
     return {"messages": response}  # Return updated messages
 
-# ✅ Function to summarize conversation
-def summarize_conversation(state: State):
-    """Create a running summary of the conversation and delete old messages."""
-    summary = state.get("summary", "")
-
-    # Create the prompt for summarization
-    if summary:
-        summary_prompt = f"Current summary: {summary}\n\nExtend the summary with the new messages."
-    else:
-        summary_prompt = "Summarize the conversation."
-
-    # Append summary request to chat history
-    messages = state["messages"] + [HumanMessage(content=summary_prompt)]
-    response = model.invoke(messages)
-
-    # Keep only the last two messages, remove older ones
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-
-    return {"summary": response.content, "messages": delete_messages}
-
 # ✅ Function to decide whether to summarize or continue chatting
 def should_continue(state: State):
-    """Determine next step based on message count."""
-    messages = state["messages"]
-    return "summarize_conversation" if len(messages) > 6 else END  # Summarize if >6 messages
+    """Summarize once the messages not yet in the summary exceed the token budget."""
+    return "summarize_conversation" if summary_memory.should_summarize(state) else END
 
 # ✅ Define the chatbot's conversation graph
 workflow = StateGraph(State)
 
 # Add chatbot processing & summarization nodes
 workflow.add_node("conversation", call_model)
-workflow.add_node("summarize_conversation", summarize_conversation)
+workflow.add_node("summarize_conversation", summary_memory.summarize)  # Only sends new messages
 
 # Set conversation flow
 workflow.add_edge(START, "conversation")  # Start with conversation
@@ -78,4 +66,4 @@ memory = MemorySaver()
 graph = workflow.compile(checkpointer=memory)
 
 # ✅ Display conversation flowchart
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
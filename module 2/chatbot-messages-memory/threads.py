@@ -1,28 +1,39 @@
 import os, getpass
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, RemoveMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.graph import MessagesState, END
 from langgraph.graph import StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
-from IPython.display import Image, display
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from summary_memory import BackgroundSummarizer, SummaryMemory
+from token_count import openai_token_counter
+from retention import Compactor, RetentionPolicy
+from file_saver import FileSaver
 
 # 🔹 Set API Keys for OpenAI and LangChain
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
 
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 # 🔹 Define Chat Model (GPT-4o)
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+model = chat_model(model="gpt-4o", temperature=0)
 
-# 🔹 Define State to Keep Messages & Summary
+# 🔹 Define State to Keep Messages, Summary & Summarized Message IDs
 class State(MessagesState):
     summary: str
+    summarized_ids: list[str]  # watermark: messages already folded into the summary
+
+# 🔹 Summarization memory: sends only new messages, triggered by a token budget
+summary_memory = SummaryMemory(model, openai_token_counter("gpt-4o"), max_tokens=300, keep_last=2)
 
 # =============================
 # 🔹 Function to Call the Model
@@ -44,47 +55,6 @@ def call_model(state: State):
     response = model.invoke(messages)
     return {"messages": response}
 
-# ==================================
-# 🔹 Function to Summarize Messages
-# ==================================
-def summarize_conversation(state: State):
-    """Summarizes conversation when messages exceed 6."""
-    
-    # Get existing summary (if available)
-    summary = state.get("summary", "")
-
-    # Create a prompt for summarization
-    if summary:
-        summary_message = (
-            f"This is a summary of the conversation so far: {summary}\n\n"
-            "Extend the summary by including the new messages above:"
-        )
-    else:
-        summary_message = "Create a summary of the conversation above:"
-
-    # Append summary prompt to messages
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
-    response = model.invoke(messages)
-
-    # Keep only the last 2 messages, remove older ones
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-
-    return {"summary": response.content, "messages": delete_messages}
-
-# =====================================
-# 🔹 Function to Decide Next Step
-# =====================================
-def should_continue(state: State):
-    """Decides whether to continue chat or summarize conversation."""
-    
-    messages = state["messages"]
-    
-    # If messages exceed 6, summarize the conversation
-    if len(messages) > 6:
-        return "summarize_conversation"
-    
-    return END  # Otherwise, end this step
-
 # ==========================
 # 🔹 Create Conversation Graph
 # ==========================
@@ -92,21 +62,38 @@ workflow = StateGraph(State)
 
 # Add nodes
 workflow.add_node("conversation", call_model)
-workflow.add_node("summarize_conversation", summarize_conversation)
+workflow.add_node("summarize_conversation", summary_memory.summarize)
 
-# Define graph flow
+# Define graph flow: the reply ends the run; the summary is written afterwards in the background
 workflow.add_edge(START, "conversation")
-workflow.add_conditional_edges("conversation", should_continue)
-workflow.add_edge("summarize_conversation", END)
+workflow.add_edge("conversation", END)
+workflow.add_edge("summarize_conversation", END)  # only reached through update_state
 
 # Compile the graph
-memory = MemorySaver()  # Save checkpoints
+# Save checkpoints in memory, or set CHECKPOINT_LOG=<path> to keep them in an
+# append-only log file that survives restarts (threads resume where they left off)
+CHECKPOINT_LOG = os.environ.get("CHECKPOINT_LOG")
+memory = FileSaver(CHECKPOINT_LOG) if CHECKPOINT_LOG else MemorySaver()
 graph = workflow.compile(checkpointer=memory)
 
 # ==========================
 # 🔹 Visualize Conversation Flow
 # ==========================
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
+
+# ==========================
+# 🔹 Background Summarizer
+# ==========================
+# Runs summary_memory after each turn has returned and commits it to the thread as a
+# follow-up checkpoint, so no turn waits for the summarization call
+summarizer = BackgroundSummarizer(graph, summary_memory, as_node="summarize_conversation")
+
+# ==========================
+# 🔹 Checkpoint Retention
+# ==========================
+# Keep each thread's last 10 checkpoints (plus interrupts and named fork points);
+# older ones are squashed away in the background every 30 seconds
+compactor = Compactor(memory, RetentionPolicy(keep_last=10), interval=30).start()
 
 # ==========================
 # 🔹 Start a Conversation (Thread 1)
@@ -115,32 +102,42 @@ config = {"configurable": {"thread_id": "1"}}
 
 # 🟢 User starts a chat
 input_message = HumanMessage(content="hi! I'm Lance")
-output = graph.invoke({"messages": [input_message]}, config)
+output = summarizer.invoke({"messages": [input_message]}, config)
 for m in output['messages'][-1:]:
     print(m.pretty_print())
 
 # 🟢 User asks another question
 input_message = HumanMessage(content="what's my name?")
-output = graph.invoke({"messages": [input_message]}, config)
+output = summarizer.invoke({"messages": [input_message]}, config)
 for m in output['messages'][-1:]:
     print(m.pretty_print())
 
 # 🟢 User talks about sports
 input_message = HumanMessage(content="I like the 49ers!")
-output = graph.invoke({"messages": [input_message]}, config)
+output = summarizer.invoke({"messages": [input_message]}, config)
 for m in output['messages'][-1:]:
     print(m.pretty_print())
 
 # ==========================
 # 🔹 Check the Summary (if available)
 # ==========================
+summarizer.wait()  # the summary is written in the background; wait for it before reading
 print("Summary so far:", graph.get_state(config).values.get("summary", ""))
 
 # 🟢 User continues chat later
 input_message = HumanMessage(content="I like Nick Bosa, isn't he the highest paid defensive player?")
-output = graph.invoke({"messages": [input_message]}, config)
+output = summarizer.invoke({"messages": [input_message]}, config)
 for m in output['messages'][-1:]:
     print(m.pretty_print())
 
 # 🔹 Check Updated Summary
+summarizer.close()
 print("Updated Summary:", graph.get_state(config).values.get("summary", ""))
+
+# 🔹 Apply retention one last time and report
+compactor.stop()
+compactor.run_once()
+print("Checkpoints removed by retention:", compactor.removed)
+if isinstance(memory, FileSaver):
+    memory.vacuum()  # reclaim the log space of the removed checkpoints
+    memory.close()
@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+from typing import Annotated
+from typing_extensions import TypedDict
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langchain_core.messages import AIMessage, HumanMessage, AnyMessage, RemoveMessage
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from message_log import IndexedMessages, MessageLog, add_messages_indexed
+
+# === Same semantics as add_messages: append, re-write by ID, remove by ID ===
+messages = [
+    AIMessage(content="Hi.", name="Bot", id="1"),
+    HumanMessage(content="Hi.", name="Lance", id="2"),
+    AIMessage(content="So you said you were researching ocean mammals?", name="Bot", id="3"),
+    HumanMessage(content="Yes, I know about whales. But what others should I learn about?", name="Lance", id="4"),
+]
+
+log = add_messages_indexed(messages, HumanMessage(content="I'm looking for information on whales, specifically", name="Lance", id="2"))
+log = add_messages_indexed(log, [RemoveMessage(id="3"), RemoveMessage(id="4")])
+log = add_messages_indexed(log, AIMessage(content="Whales are fascinating!", name="Bot"))
+
+expected = add_messages(messages, HumanMessage(content="I'm looking for information on whales, specifically", name="Lance", id="2"))
+expected = add_messages(expected, [RemoveMessage(id="3"), RemoveMessage(id="4")])
+
+print("\nIndexed Messages:")
+for msg in log:
+    print(f"{msg.name} (ID: {msg.id}): {msg.content}")
+print("Matches add_messages:", log[:-1] == expected)
+
+# === As the messages channel of a graph ===
+class IndexedMessagesState(TypedDict):
+    messages: Annotated[list[AnyMessage], IndexedMessages]
+
+def node_1(state):
+    print("--- Node 1 ---")
+    # Reads work like a list: indexing, slicing, len(), iteration, `list + messages`
+    last = state["messages"][-1]
+    return {"messages": [AIMessage(content=f"You said: {last.content}", name="Model")]}
+
+builder = StateGraph(IndexedMessagesState)
+builder.add_node("node_1", node_1)
+builder.add_edge(START, "node_1")
+builder.add_edge("node_1", END)
+graph = builder.compile()
+
+result = graph.invoke({"messages": [HumanMessage(content="Tell me about narwhals.", name="Lance")]})
+print("\nGraph Output:")
+for msg in result["messages"]:
+    print(f"{msg.name}: {msg.content}")
+
+
+# === Benchmark: many small updates against a 100k-message history ===
+N_HISTORY = 100_000
+N_UPDATES = 50
+
+def make_history():
+    return [HumanMessage(content=f"message {i}", id=str(i)) for i in range(N_HISTORY)]
+
+def make_update(i):
+    # One new message, one re-write and one removal, like a busy thread would see
+    return [
+        AIMessage(content=f"reply {i}", id=f"new-{i}"),
+        HumanMessage(content=f"edited {i}", id=str(N_HISTORY - 1 - i)),
+        RemoveMessage(id=str(i)),
+    ]
+
+def bench(reducer, history):
+    start = time.perf_counter()
+    for i in range(N_UPDATES):
+        history = reducer(history, make_update(i))
+    return time.perf_counter() - start, history
+
+print(f"\n### Merging {N_UPDATES} updates into a {N_HISTORY:,}-message history ###")
+t_plain, plain = bench(add_messages, make_history())
+t_indexed, indexed = bench(add_messages_indexed, MessageLog(make_history()))
+print(f"add_messages:         {t_plain * 1000:8.1f} ms ({t_plain / N_UPDATES * 1e6:8.1f} µs/update)")
+print(f"add_messages_indexed: {t_indexed * 1000:8.1f} ms ({t_indexed / N_UPDATES * 1e6:8.1f} µs/update)")
+print("Same result:", indexed == plain)
+
+
+# === Benchmark: the same history as a graph channel ===
+# The reducer above is only part of a step: the graph also hands the state to the
+# node and applies its write. Here a chain of nodes each reads the last message and
+# appends a reply; a loop on a conditional edge also reads a fresh copy of the
+# state every step (one flat list copy, see message_log.py). No checkpointer, so no
+# step serializes the history.
+N_STEPS = 50
+
+class PlainState(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+
+def reply(state):
+    return {"messages": [AIMessage(content=f"re: {state['messages'][-1].content}")]}
+
+def chain(state_type):
+    builder = StateGraph(state_type)
+    for i in range(N_STEPS):
+        builder.add_node(f"step_{i}", reply)
+        builder.add_edge(START if i == 0 else f"step_{i - 1}", f"step_{i}")
+    builder.add_edge(f"step_{N_STEPS - 1}", END)
+    return builder.compile()
+
+def loop(state_type):
+    builder = StateGraph(state_type)
+    builder.add_node("step", reply)
+    builder.add_edge(START, "step")
+    builder.add_conditional_edges("step", lambda state: "step" if len(state["messages"]) < N_HISTORY + N_STEPS else END)
+    return builder.compile()
+
+def bench_graph(graph):
+    history = make_history()
+    start = time.perf_counter()
+    result = graph.invoke({"messages": history}, {"recursion_limit": N_STEPS + 10})
+    return time.perf_counter() - start, len(result["messages"])
+
+print(f"\n### {N_STEPS} graph steps on a {N_HISTORY:,}-message history (incl. loading it once) ###")
+for name, build in (("chain of nodes", chain), ("conditional loop", loop)):
+    t_plain, n_plain = bench_graph(build(PlainState))
+    t_indexed, n_indexed = bench_graph(build(IndexedMessagesState))
+    print(f"{name:<17} add_messages: {t_plain * 1000:8.1f} ms   IndexedMessages: {t_indexed * 1000:8.1f} ms   same length: {n_plain == n_indexed}")
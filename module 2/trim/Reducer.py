@@ -1,9 +1,11 @@
 import os
 import getpass
 from pprint import pprint
-from IPython.display import Image, display
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
 from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
-from langchain_openai import ChatOpenAI
 from langgraph.graph import MessagesState, StateGraph, START, END
 
 # Step 1: Set up API keys
@@ -11,11 +13,12 @@ def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
 
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 # Step 2: Define Message Filtering (Reducer)
 def filter_messages(state: MessagesState):
@@ -27,7 +30,7 @@ def filter_messages(state: MessagesState):
     return {"messages": delete_messages}
 
 # Step 3: Define Chat Model Node
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 
 def chat_model_node(state: MessagesState):    
     """
@@ -47,7 +50,7 @@ builder.add_edge("chat_model", END)  # Chat Model → End
 graph = builder.compile()
 
 # Display the graph structure
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Step 5: Define Messages (Long Conversation)
 messages = [
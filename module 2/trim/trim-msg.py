@@ -1,9 +1,12 @@
 import os
 import getpass
 from pprint import pprint
-from IPython.display import Image, display
-from langchain_core.messages import AIMessage, HumanMessage, trim_messages
-from langchain_openai import ChatOpenAI
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from token_count import openai_token_counter
+from langchain_core.messages import AIMessage, HumanMessage
 from langgraph.graph import MessagesState, StateGraph, START, END
 
 # Step 1: Set up API keys
@@ -11,25 +14,23 @@ def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
 
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 # Step 2: Define Chat Model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
+
+# Token counter built once; each message is tokenized only the first time it is seen
+token_counter = openai_token_counter("gpt-4o")
 
 # Step 3: Define Chat Node with Message Trimming
 def chat_model_node(state: MessagesState):
-    # Trim messages to a max of 100 tokens
-    messages = trim_messages(
-        state["messages"],
-        max_tokens=100,
-        strategy="last",  # Keep the last messages until the limit
-        token_counter=ChatOpenAI(model="gpt-4o"),
-        allow_partial=False  # Don't allow incomplete messages
-    )
+    # Trim messages to a max of 100 tokens, keeping the last whole messages that fit
+    messages = token_counter.trim_last(state["messages"], max_tokens=100)
     return {"messages": [llm.invoke(messages)]}
 
 # Step 4: Build the Graph
@@ -42,7 +43,7 @@ builder.add_edge("chat_model", END)
 graph = builder.compile()
 
 # Display the graph structure
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Step 5: Create Initial Messages (Simulating a Long Conversation)
 messages = [
@@ -55,13 +56,7 @@ messages = [
 ]
 
 # Step 6: Trim Messages Before Sending to AI
-trimmed_messages = trim_messages(
-    messages,
-    max_tokens=10,  # Only keep messages within 100 tokens
-    strategy="last",
-    token_counter=ChatOpenAI(model="gpt-4o"),
-    allow_partial=False
-)
+trimmed_messages = token_counter.trim_last(messages, max_tokens=10)  # Only keep messages within 10 tokens
 
 # Print Trimmed Messages
 print("\n✂️ Trimmed Messages (Before Sending to AI):")
@@ -82,4 +77,7 @@ messages_out_trim = graph.invoke({'messages': messages})
 # Print Final Trimmed Messages
 print("\n📝 Chatbot Response After Follow-up Question:")
 for m in messages_out_trim["messages"]:
-    m.pretty_print()
\ No newline at end of file
+    m.pretty_print()
+
+# Only messages that were new on a turn went through the tokenizer
+print(f"\nTokenized {token_counter.tokenized} messages in total")
@@ -1,27 +1,38 @@
 import os, getpass
-from langchain_openai import ChatOpenAI
-from IPython.display import Image, display
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from tool_cache import cacheable
 from langgraph.checkpoint.memory import MemorySaver
+from file_saver import FileSaver
+from mongo_saver import BufferedMongoDBSaver
+from tiered_saver import TieredSaver
+from approval_queue import ApprovalQueue
 from langgraph.graph import MessagesState, START, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 
 # Set OpenAI API Key
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
-# Define arithmetic tools
+# Define arithmetic tools (pure, so results are cached by arguments)
+@cacheable()
 def multiply(a: int, b: int) -> int:
     """Multiply a and b."""
     return a * b
 
+@cacheable()
 def add(a: int, b: int) -> int:
     """Add a and b."""
     return a + b
 
+@cacheable()
 def divide(a: int, b: int) -> float:
     """Divide a by b."""
     return a / b
@@ -30,7 +41,7 @@ def divide(a: int, b: int) -> float:
 tools = [add, multiply, divide]
 
 # Initialize AI model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 llm_with_tools = llm.bind_tools(tools)
 
 # Define system message
@@ -52,12 +63,23 @@ builder.add_edge(START, "assistant")
 builder.add_conditional_edges("assistant", tools_condition)
 builder.add_edge("tools", "assistant")
 
+# Durable checkpoints (MONGODB_URI or CHECKPOINT_LOG, else in memory) behind an
+# in-process hot cache: resuming after the breakpoint reads the cached checkpoint
+MONGODB_URI = os.environ.get("MONGODB_URI")
+CHECKPOINT_LOG = os.environ.get("CHECKPOINT_LOG")
+if MONGODB_URI:
+    backend = BufferedMongoDBSaver.from_uri(MONGODB_URI)
+elif CHECKPOINT_LOG:
+    backend = FileSaver(CHECKPOINT_LOG)
+else:
+    backend = MemorySaver()
+memory = TieredSaver(backend, max_bytes=16 * 2**20)
+
 # Enable breakpoint before tools execution
-memory = MemorySaver()
 graph = builder.compile(interrupt_before=["tools"], checkpointer=memory)
 
 # Display the graph
-display(Image(graph.get_graph(xray=True).draw_mermaid_png()))
+display_graph(graph, xray=True)
 
 # Input message
 initial_input = {"messages": HumanMessage(content="Multiply 2 and 3")}
@@ -69,13 +91,26 @@ thread = {"configurable": {"thread_id": "2"}}
 for event in graph.stream(initial_input, thread, stream_mode="values"):
     event['messages'][-1].pretty_print()
 
-# Ask for user approval
-user_approval = input("Do you want to call the tool? (yes/no): ")
-
-# Handle approval decision
-if user_approval.lower() == "yes":
-    # Continue execution if approved
-    for event in graph.stream(None, thread, stream_mode="values"):
-        event['messages'][-1].pretty_print()
+# The paused thread is only checkpoints now; a reviewer works through the queue of
+# threads parked before "tools", whenever (and from whichever process) they get to it
+approvals = ApprovalQueue(graph)
+parked = approvals.pending(node="tools")
+print("Waiting for approval:", [p.thread_id for p in parked])
+
+# Reviewer's decision (APPROVE_TOOLS=no to reject)
+if os.environ.get("APPROVE_TOOLS", "yes").lower() == "yes":
+    # Continue execution of every approved thread
+    for thread_id, values in approvals.approve(parked).items():
+        values['messages'][-1].pretty_print()
 else:
+    # Answer the tool calls with a refusal instead of running them
+    approvals.reject(parked, update=lambda values: {"messages": [
+        ToolMessage(content="Operation cancelled by user.", tool_call_id=call["id"])
+        for call in values["messages"][-1].tool_calls
+    ]})
     print("Operation cancelled by user.")
+print("Approvals:", approvals.stats())
+
+print("Checkpoint cache:", memory.stats())
+if hasattr(backend, "close"):
+    backend.close()
@@ -1,7 +1,10 @@
-from IPython.display import Image, display
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # repo root, for shared helpers
+from render import display_graph
 from typing_extensions import TypedDict
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.errors import NodeInterrupt
+from interrupt_guard import InterruptGuard
 from langgraph.graph import START, END, StateGraph
 
 # Define the state structure for our graph
@@ -13,11 +16,16 @@ def step_1(state: State) -> State:
     print("---Step 1---")
     return state
 
-# Step 2: Conditional check - raise NodeInterrupt if input length > 5
+# Interrupt conditions declared on the node, so retries can be checked without running it
+guard = InterruptGuard()
+
+# Step 2: Conditional check - interrupt if input length > 5 (only "input" matters)
+@guard.when(
+    lambda state: len(state['input']) > 5,
+    watch=["input"],
+    message=lambda state: f"Received input that is longer than 5 characters: {state['input']}",
+)
 def step_2(state: State) -> State:
-    if len(state['input']) > 5:
-        raise NodeInterrupt(f"Received input that is longer than 5 characters: {state['input']}")
-    
     print("---Step 2---")
     return state
 
@@ -47,7 +55,7 @@ memory = MemorySaver()
 graph = builder.compile(checkpointer=memory)
 
 # Display the graph structure
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Run the graph with an input that triggers the interruption
 initial_input = {"input": "hello world"}
@@ -64,8 +72,9 @@ print("Next node to execute:", state.next)
 # Show the interruption log
 print("Logged interruptions:", state.tasks)
 
-# Try resuming the graph (will still be interrupted unless state is modified)
-for event in graph.stream(None, thread_config, stream_mode="values"):
+# Try resuming the graph (will still be interrupted unless state is modified);
+# the guard answers from the checkpoint: step_2 doesn't run and nothing is written
+for event in guard.stream(graph, None, thread_config, stream_mode="values"):
     print(event)
 
 # Inspect the graph state again
@@ -78,6 +87,7 @@ graph.update_state(
     {"input": "hi"},
 )
 
-# Resume execution with the new state
-for event in graph.stream(None, thread_config, stream_mode="values"):
+# Resume execution with the new state (the guard re-checks it and lets it run)
+for event in guard.stream(graph, None, thread_config, stream_mode="values"):
     print(event)
+print("Retries answered without running step_2:", guard.skipped)
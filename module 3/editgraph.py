@@ -1,12 +1,16 @@
 import os, getpass
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
 
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
-from langchain_openai import ChatOpenAI
 
 # Define arithmetic functions as tools
 def multiply(a: int, b: int) -> int:
@@ -25,11 +29,14 @@ def divide(a: int, b: int) -> float:
 tools = [add, multiply, divide]
 
 # Initialize the AI model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 llm_with_tools = llm.bind_tools(tools)
 
-from IPython.display import Image, display
 from langgraph.checkpoint.memory import MemorySaver
+from file_saver import FileSaver
+from mongo_saver import BufferedMongoDBSaver
+from tiered_saver import TieredSaver
+from state_edits import apply_edits
 from langgraph.graph import MessagesState, START, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -53,12 +60,22 @@ builder.add_edge(START, "assistant")
 builder.add_conditional_edges("assistant", tools_condition)
 builder.add_edge("tools", "assistant")
 
-# Set up memory for state tracking
-memory = MemorySaver()
+# Set up memory for state tracking: durable checkpoints (MONGODB_URI or
+# CHECKPOINT_LOG, else in memory) behind an in-process hot cache, so the
+# get_state / update_state / resume round trips below don't reload the thread
+MONGODB_URI = os.environ.get("MONGODB_URI")
+CHECKPOINT_LOG = os.environ.get("CHECKPOINT_LOG")
+if MONGODB_URI:
+    backend = BufferedMongoDBSaver.from_uri(MONGODB_URI)
+elif CHECKPOINT_LOG:
+    backend = FileSaver(CHECKPOINT_LOG)
+else:
+    backend = MemorySaver()
+memory = TieredSaver(backend, max_bytes=16 * 2**20)
 graph = builder.compile(interrupt_before=["assistant"], checkpointer=memory)
 
 # Display the graph structure
-display(Image(graph.get_graph(xray=True).draw_mermaid_png()))
+display_graph(graph, xray=True)
 
 # Define initial input
 initial_input = {"messages": [HumanMessage(content="Multiply 2 and 3")]}
@@ -74,14 +91,17 @@ for event in graph.stream(initial_input, thread, stream_mode="values"):
 state = graph.get_state(thread)
 print("Current State:", state)
 
-# Modify the state (change input)
-graph.update_state(
-    thread,
-    {"messages": [HumanMessage(content="No, actually multiply 3 and 3!")]},
-)
+# Modify the state (change input): rewrite the request and add a note, as the
+# user (START) would have sent them. Both edits land in one checkpoint, and the
+# resulting snapshot comes back directly instead of through another get_state
+original = state.values["messages"][0]
+snapshot = apply_edits(graph, thread, [
+    ({"messages": [HumanMessage(content="No, actually multiply 3 and 3!", id=original.id)]}, START),
+    ({"messages": [HumanMessage(content="Then add 1 to the result.")]}, START),
+])
 
 # Display the updated state
-new_state = graph.get_state(thread).values
+new_state = snapshot.values
 print("\nUpdated State Messages:")
 for m in new_state['messages']:
     m.pretty_print()
@@ -89,3 +109,7 @@ for m in new_state['messages']:
 # Continue execution with the modified state
 for event in graph.stream(None, thread, stream_mode="values"):
     event['messages'][-1].pretty_print()
+
+print("Checkpoint cache:", memory.stats())
+if hasattr(backend, "close"):
+    backend.close()
@@ -0,0 +1,86 @@
+import os, getpass
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from cassette import chat_model, replaying
+from graph_server import create_app
+from summary_memory import BackgroundSummarizer, SummaryMemory
+from token_count import openai_token_counter
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph import MessagesState
+
+# 🌐 The streaming.py chatbot, served to browsers
+#   python "module 3/streaming/server.py"          (needs `uvicorn`)
+#
+#   curl -N localhost:8000/threads/1/stream -d '{"input": {"messages": [{"role": "user", "content": "hi! I am Lance"}]}, "stream_mode": ["patches", "messages"]}'
+#   new EventSource('/threads/1/stream?input={"messages":["hi!"]}&stream_mode=messages')
+#   new WebSocket('ws://localhost:8000/threads/1/ws')   // then send {"input": ..., "stream_mode": [...]}
+
+
+# Function to set environment variables
+def _set_env(var: str):
+    if not os.environ.get(var):
+        os.environ[var] = getpass.getpass(f"{var}: ")
+
+
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+
+
+# Define the model
+model = chat_model(model="gpt-4o", temperature=0)
+
+
+# Define chatbot state
+class State(MessagesState):
+    summary: str
+    summarized_ids: list[str]
+
+
+# Summarize new messages once they exceed ~300 tokens, keeping the last two
+summary_memory = SummaryMemory(model, openai_token_counter("gpt-4o"), max_tokens=300, keep_last=2)
+
+
+# Function to call the model and handle memory
+async def call_model(state: State, config: RunnableConfig):
+    summary = state.get("summary", "")
+
+    # Add summary to system message if it exists
+    messages = state["messages"]
+    if summary:
+        system_message = f"Summary of conversation earlier: {summary}"
+        messages = [SystemMessage(content=system_message)] + messages
+
+    # Async, so a client disconnect cancels the model call instead of waiting it out
+    response = await model.ainvoke(messages, config)
+    return {"messages": response}
+
+
+# Build the graph
+workflow = StateGraph(State)
+workflow.add_node("conversation", call_model)
+workflow.add_node("summarize_conversation", summary_memory.summarize)
+workflow.add_edge(START, "conversation")
+workflow.add_edge("conversation", END)
+workflow.add_edge("summarize_conversation", END)  # only reached through update_state
+
+memory = MemorySaver()
+graph = workflow.compile(checkpointer=memory)
+
+# Summaries are committed in the background after each run, per thread
+summarizer = BackgroundSummarizer(graph, summary_memory, as_node="summarize_conversation")
+
+# At most 256 events wait for a slow client before the run is held back
+app = create_app(graph, stream_mode=["patches", "messages"], queue_size=256, summarizer=summarizer)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    try:
+        uvicorn.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", "8000")))
+    finally:
+        summarizer.close()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from token_stream import astream_tokens
+
+import asyncio
+from itertools import cycle
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import MessagesState, StateGraph, START, END
+
+# ⏱️ Token streaming benchmark: astream_events vs. stream_mode="messages" vs. astream_tokens
+# A fake chat model streams a fixed reply word by word, so no API key is needed and
+# only the streaming machinery is measured. The graph mirrors streaming.py plus a
+# second node that also calls a model, so there are tokens nobody subscribed to.
+
+TOKENS_PER_REPLY = 500
+RUNS = 20
+
+model = GenericFakeChatModel(messages=cycle([AIMessage(content=" ".join(["token"] * TOKENS_PER_REPLY))]))
+
+
+def call_model(state: MessagesState):
+    return {"messages": model.invoke(state["messages"])}
+
+
+def audit(state: MessagesState):
+    model.invoke(state["messages"])  # e.g. a moderation check; its tokens are not wanted
+    return {}
+
+
+builder = StateGraph(MessagesState)
+builder.add_node("conversation", call_model)
+builder.add_node("audit", audit)
+builder.add_edge(START, "conversation")
+builder.add_edge("conversation", "audit")
+builder.add_edge("audit", END)
+graph = builder.compile()
+
+input_message = {"messages": [HumanMessage(content="Tell me about the 49ers NFL team")]}
+
+
+# === Ways to get the conversation node's tokens ===
+async def events_filtered_by_client():
+    """What streaming.py did: every v2 event, filtered on type and node."""
+    tokens = events = 0
+    async for event in graph.astream_events(input_message, version="v2"):
+        events += 1
+        if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node", "") == "conversation":
+            tokens += 1
+    return tokens, events
+
+
+async def events_filtered_by_type():
+    """astream_events' own include_types filter (applied after each event is built)."""
+    tokens = events = 0
+    async for event in graph.astream_events(input_message, version="v2", include_types=["chat_model"]):
+        events += 1
+        if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node", "") == "conversation":
+            tokens += 1
+    return tokens, events
+
+
+async def messages_mode():
+    """stream_mode="messages": every model's tokens and every node's messages, filtered on node."""
+    tokens = events = 0
+    async for chunk, metadata in graph.astream(input_message, stream_mode="messages"):
+        events += 1
+        if metadata.get("langgraph_node") == "conversation":
+            tokens += 1
+    return tokens, events
+
+
+async def tokens_at_source():
+    """astream_tokens: only the conversation node's model calls are forwarded at all."""
+    tokens = 0
+    async for _ in astream_tokens(graph, input_message, None, nodes=["conversation"]):
+        tokens += 1
+    return tokens, tokens
+
+
+async def benchmark():
+    print(f"{RUNS} runs x {TOKENS_PER_REPLY} words (a chunk per word and per space)")
+    for variant in (events_filtered_by_client, events_filtered_by_type, messages_mode, tokens_at_source):
+        await variant()  # warm up
+        start = time.perf_counter()
+        tokens = events = 0
+        for _ in range(RUNS):
+            t, e = await variant()
+            tokens += t
+            events += e
+        elapsed = time.perf_counter() - start
+        print(f"{variant.__name__:26} {tokens / elapsed:10,.0f} chunks/s  {events / RUNS:8,.0f} events received per run")
+
+asyncio.run(benchmark())
@@ -1,8 +1,14 @@
 import os, getpass
-from IPython.display import Image, display
-
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, RemoveMessage
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from summary_memory import BackgroundSummarizer, SummaryMemory
+from token_count import openai_token_counter
+from state_patch import apply_patch, stream_modes, stream_patches
+from token_stream import astream_tokens
+
+from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 
 from langgraph.checkpoint.memory import MemorySaver
@@ -16,16 +22,22 @@ def _set_env(var: str):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
 
 # Define the model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+model = chat_model(model="gpt-4o", temperature=0)
 
 
 # Define chatbot state
 class State(MessagesState):
     summary: str
+    summarized_ids: list[str]
+
+
+# Summarize new messages once they exceed ~300 tokens, keeping the last two
+summary_memory = SummaryMemory(model, openai_token_counter("gpt-4o"), max_tokens=300, keep_last=2)
 
 
 # Function to call the model and handle memory
@@ -42,93 +54,108 @@ def call_model(state: State, config: RunnableConfig):
     return {"messages": response}
 
 
-# Function to summarize conversation when needed
-def summarize_conversation(state: State):
-    summary = state.get("summary", "")
-
-    if summary:
-        summary_message = (
-            f"This is summary of the conversation to date: {summary}\n\n"
-            "Extend the summary by taking into account the new messages above:"
-        )
-    else:
-        summary_message = "Create a summary of the conversation above:"
-
-    messages = state["messages"] + [HumanMessage(content=summary_message)]
-    response = model.invoke(messages)
-
-    # Keep only the 2 most recent messages
-    delete_messages = [RemoveMessage(id=m.id) for m in state["messages"][:-2]]
-
-    return {"summary": response.content, "messages": delete_messages}
-
-
-# Function to decide whether to continue or summarize
-def should_continue(state: State):
-    messages = state["messages"]
-
-    # Summarize if more than 6 messages
-    if len(messages) > 6:
-        return "summarize_conversation"
-    return END
-
-
 # Build the graph
 workflow = StateGraph(State)
 workflow.add_node("conversation", call_model)
-workflow.add_node("summarize_conversation", summarize_conversation)
+workflow.add_node("summarize_conversation", summary_memory.summarize)
 
+# The run ends with the reply; summaries are committed afterwards by the background summarizer
 workflow.add_edge(START, "conversation")
-workflow.add_conditional_edges("conversation", should_continue)
-workflow.add_edge("summarize_conversation", END)
+workflow.add_edge("conversation", END)
+workflow.add_edge("summarize_conversation", END)  # only reached through update_state
 
 # Compile the graph
 memory = MemorySaver()
 graph = workflow.compile(checkpointer=memory)
 
 # Display graph structure
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
+
+# Summarize each thread in the background once a streamed turn has finished
+summarizer = BackgroundSummarizer(graph, summary_memory, as_node="summarize_conversation")
 
 
 # **Streaming Conversation State Updates**
 print("\n### Streaming with 'updates' mode ###")
 config = {"configurable": {"thread_id": "1"}}
-for chunk in graph.stream({"messages": [HumanMessage(content="hi! I'm Lance")]}, config, stream_mode="updates"):
-    print(chunk)
+with summarizer.turn(config):
+    for chunk in graph.stream({"messages": [HumanMessage(content="hi! I'm Lance")]}, config, stream_mode="updates"):
+        print(chunk)
 
 
 # **Streaming Full Graph State**
 print("\n### Streaming with 'values' mode ###")
 config = {"configurable": {"thread_id": "2"}}
 input_message = HumanMessage(content="hi! I'm Lance")
-for event in graph.stream({"messages": [input_message]}, config, stream_mode="values"):
-    for m in event["messages"]:
-        print(m.content)
-    print("---" * 25)
+with summarizer.turn(config):
+    for event in graph.stream({"messages": [input_message]}, config, stream_mode="values"):
+        for m in event["messages"]:
+            print(m.content)
+        print("---" * 25)
+
+
+# **Streaming State Patches**
+# Like 'values', but each event carries only what changed (appended / replaced /
+# removed messages, changed keys); apply_patch rebuilds the full state client-side
+print("\n### Streaming state patches ###")
+config = {"configurable": {"thread_id": "2"}}
+client_state = graph.get_state(config).values
+input_message = HumanMessage(content="what's my name?")
+with summarizer.turn(config):
+    for patch in stream_patches(graph, {"messages": [input_message]}, config, since=client_state):
+        print({k: list(v) for k, v in patch.items()})
+        client_state = apply_patch(client_state, patch)
+for m in client_state["messages"]:
+    print(m.content)
+print("---" * 25)
+
+
+# **Several Stream Modes from One Run**
+# Updates for an audit log, patches for the UI state and model tokens for the chat
+# bubble, all from a single execution as (mode, payload) tuples
+print("\n### Streaming updates, patches and tokens together ###")
+config = {"configurable": {"thread_id": "6"}}
+client_state = {}
+input_message = HumanMessage(content="hi! I'm Lance")
+with summarizer.turn(config):
+    for mode, payload in stream_modes(graph, {"messages": [input_message]}, config, ["updates", "patches", "messages"]):
+        if mode == "updates":
+            print("audit:", list(payload))
+        elif mode == "patches":
+            client_state = apply_patch(client_state, payload)
+        else:
+            chunk, metadata = payload
+            print(chunk.content, end="|")
+print("\nUI state:", [m.content for m in client_state["messages"]])
 
 
 # **Streaming Tokens (Real-time)**
+# Every model token of the run with the node it came from; astream_tokens forwards
+# token callbacks only, instead of building every v2 event of astream_events
 import asyncio
 
 async def stream_tokens():
     config = {"configurable": {"thread_id": "3"}}
     input_message = HumanMessage(content="Tell me about the 49ers NFL team")
     
-    async for event in graph.astream_events({"messages": [input_message]}, config, version="v2"):
-        print(f"Node: {event['metadata'].get('langgraph_node','')}. Type: {event['event']}. Name: {event['name']}")
+    with summarizer.turn(config):
+        async for chunk, metadata in astream_tokens(graph, {"messages": [input_message]}, config):
+            print(f"Node: {metadata['langgraph_node']}. Type: {type(chunk).__name__}. Content: {chunk.content!r}")
 
 asyncio.run(stream_tokens())
 
 
 # **Streaming AI Model Tokens from a Specific Node**
+# astream_tokens only forwards the tokens of model calls made by this node; other
+# models' tokens are dropped when they start, not filtered here; see stream_benchmark.py
 async def stream_specific_node():
     node_to_stream = "conversation"
     config = {"configurable": {"thread_id": "4"}}
     input_message = HumanMessage(content="Tell me about the 49ers NFL team")
     
-    async for event in graph.astream_events({"messages": [input_message]}, config, version="v2"):
-        if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node", "") == node_to_stream:
-            print(event["data"])
+    with summarizer.turn(config):
+        async for chunk, metadata in astream_tokens(graph, {"messages": [input_message]}, config, nodes=[node_to_stream]):
+            print({"chunk": chunk})
 
 asyncio.run(stream_specific_node())
 
@@ -139,9 +166,11 @@ async def stream_tokens_live():
     config = {"configurable": {"thread_id": "5"}}
     input_message = HumanMessage(content="Tell me about the 49ers NFL team")
     
-    async for event in graph.astream_events({"messages": [input_message]}, config, version="v2"):
-        if event["event"] == "on_chat_model_stream" and event["metadata"].get("langgraph_node", "") == node_to_stream:
-            data = event["data"]
-            print(data["chunk"].content, end="|")
+    with summarizer.turn(config):
+        async for chunk, metadata in astream_tokens(graph, {"messages": [input_message]}, config, nodes=[node_to_stream]):
+            print(chunk.content, end="|")
 
 asyncio.run(stream_tokens_live())
+
+# Let any background summaries finish before exiting
+summarizer.close()
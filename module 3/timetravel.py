@@ -1,27 +1,36 @@
 import os, getpass
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver
+from collections import deque
 from langgraph.graph import MessagesState, START, END, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from IPython.display import Image, display
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
+from tool_cache import cacheable
+from replay_cache import as_replay, replayable
+from delta_saver import DeltaMemorySaver
 
 # === Set API Key ===
 def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
-# === Define Arithmetic Tools ===
+# === Define Arithmetic Tools (pure, so replays reuse cached results) ===
+@cacheable()
 def multiply(a: int, b: int) -> int:
     """Multiply a and b."""
     return a * b
 
+@cacheable()
 def add(a: int, b: int) -> int:
     """Adds a and b."""
     return a + b
 
+@cacheable()
 def divide(a: int, b: int) -> float:
     """Divide a by b."""
     return a / b
@@ -29,13 +38,14 @@ def divide(a: int, b: int) -> float:
 tools = [add, multiply, divide]
 
 # === Initialize LLM with Tools ===
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 llm_with_tools = llm.bind_tools(tools)
 
 # === System Message ===
 sys_msg = SystemMessage(content="You are a helpful assistant tasked with performing arithmetic on a set of inputs.")
 
-# === Assistant Node ===
+# === Assistant Node (replay runs with an unchanged input reuse the recorded reply) ===
+@replayable()
 def assistant(state: MessagesState):
     return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
 
@@ -51,12 +61,12 @@ builder.add_edge(START, "assistant")
 builder.add_conditional_edges("assistant", tools_condition)
 builder.add_edge("tools", "assistant")
 
-# === Initialize Memory Saver ===
-memory = MemorySaver()
-graph = builder.compile(checkpointer=MemorySaver())
+# === Initialize Memory Saver (stores each step and fork as a splice of its parent, full snapshot every 10 links) ===
+memory = DeltaMemorySaver(snapshot_every=10)
+graph = builder.compile(checkpointer=memory)
 
 # === Visualize Graph ===
-display(Image(graph.get_graph(xray=True).draw_mermaid_png()))
+display_graph(graph, xray=True)
 
 # === Run the Graph ===
 initial_input = {"messages": [HumanMessage(content="Multiply 2 and 3")]}
@@ -66,14 +76,19 @@ for event in graph.stream(initial_input, thread, stream_mode="values"):
     event['messages'][-1].pretty_print()
 
 # === Browsing State History ===
-all_states = [s for s in graph.get_state_history(thread)]
-print(f"Total states: {len(all_states)}")
+# History streams newest first; keep only the two oldest states instead of the whole list
+total_states = 0
+oldest_states = deque(maxlen=2)
+for total_states, state in enumerate(graph.get_state_history(thread), start=1):
+    oldest_states.append(state)
+print(f"Total states: {total_states}")
 
 # Get a previous state (before the last step)
-to_replay = all_states[-2]
+to_replay = oldest_states[0]
 
 # === Replaying Execution from a Past State ===
-for event in graph.stream(None, to_replay.config, stream_mode="values"):
+# In replay mode the assistant answers unchanged inputs from its recordings
+for event in graph.stream(None, as_replay(to_replay.config), stream_mode="values"):
     event['messages'][-1].pretty_print()
 
 # === Forking Execution ===
@@ -85,8 +100,25 @@ fork_config = graph.update_state(
 )
 
 # Run the forked execution
-for event in graph.stream(None, fork_config, stream_mode="values"):
+for event in graph.stream(None, as_replay(fork_config), stream_mode="values"):
     event['messages'][-1].pretty_print()
 
+# === Exploring More Forks ===
+# Forks share the unchanged history with to_replay; each one stores only its edited message
+stored_before = memory.stored_bytes()
+for x, y in [(4, 3), (6, 3), (7, 3)]:
+    graph.update_state(
+        to_replay.config,
+        {"messages": [HumanMessage(content=f"Multiply {x} and {y}",
+                                   id=to_replay.values["messages"][0].id)]},
+    )
+print(f"3 more forks stored {memory.stored_bytes() - stored_before:,} bytes")
+
+# Replays and forks that repeat a tool call are served from the cache, and the
+# replay reused the assistant's recorded replies instead of calling the LLM again
+print("Tool cache:", {t.__name__: t.cache.stats() for t in tools})
+print("Assistant replay cache:", assistant.cache.stats())
+print(f"Checkpointed channel data: {memory.stored_bytes():,} bytes")
+
 # Get the final state after forking
 graph.get_state({'configurable': {'thread_id': '1'}})
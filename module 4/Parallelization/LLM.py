@@ -1,4 +1,7 @@
 import os, getpass
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_community.document_loaders import WikipediaLoader
@@ -91,8 +94,7 @@ builder.add_edge("generate_answer", END)  # Answer → End
 graph = builder.compile()
 
 # ✅ Visualize Graph
-from IPython.display import Image, display
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # ✅ Run the Graph with a Question
 result = graph.invoke({"question": "How were Nvidia's Q2 2024 earnings?"})
@@ -7,7 +7,9 @@ def _set_env(var: str):
 
 _set_env("OPENAI_API_KEY")
 
-from IPython.display import Image, display
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # repo root, for shared helpers
+from render import display_graph
 from typing import Any
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
@@ -56,7 +58,7 @@ builder.add_edge("d", END)     # D → End
 
 # Compile and visualize graph
 graph = builder.compile()
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Run the graph
 graph.invoke({"state": []})
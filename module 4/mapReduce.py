@@ -3,9 +3,11 @@ import operator
 from typing import Annotated
 from typing_extensions import TypedDict
 from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
 from langgraph.constants import Send
-from IPython.display import Image
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # repo root, for shared helpers
+from render import display_graph
+from cassette import chat_model, replaying
 from langgraph.graph import END, StateGraph, START
 
 # Set environment variables
@@ -13,11 +15,12 @@ def _set_env(var: str):
     if not os.environ.get(var):
         os.environ[var] = getpass.getpass(f"{var}: ")
 
-_set_env("OPENAI_API_KEY")
-_set_env("LANGCHAIN_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
+    _set_env("LANGCHAIN_API_KEY")
 
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_PROJECT"] = "langchain-academy"
 
 # Prompts
 subjects_prompt = """Generate a list of 3 sub-topics that are all related to this overall topic: {topic}."""
@@ -25,7 +28,7 @@ joke_prompt = """Generate a joke about {subject}"""
 best_joke_prompt = """Below are a bunch of jokes about {topic}. Select the best one! Return the ID of the best one, starting 0 as the ID for the first joke. Jokes: \n\n  {jokes}"""
 
 # LLM model
-model = ChatOpenAI(model="gpt-4o", temperature=0)
+model = chat_model(model="gpt-4o", temperature=0)
 
 # Define state types
 class Subjects(BaseModel):
@@ -82,7 +85,7 @@ graph.add_edge("best_joke", END)
 
 # Compile the graph
 app = graph.compile()
-Image(app.get_graph().draw_mermaid_png())
+display_graph(app)
 
 # Execute the pipeline
 for s in app.stream({"topic": "fruits"}):
@@ -0,0 +1,351 @@
+import atexit
+import threading
+from datetime import UTC, datetime
+from itertools import islice
+from typing import Any, Iterator, NamedTuple, Optional
+
+from langgraph.checkpoint.base import WRITES_IDX_MAP, CheckpointTuple, get_checkpoint_id
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.checkpoint.mongodb.utils import (
+    DRIVER_METADATA,
+    _validate_filter,
+    _validate_identifier,
+    dumps_metadata,
+    loads_metadata,
+)
+from pymongo import ASCENDING, DESCENDING, MongoClient, UpdateOne
+
+from graph_constants import INTERRUPT
+
+# 🍃 Write-behind MongoDB checkpointer
+# `MongoDBSaver` does one round trip per checkpoint and per batch of task writes, all
+# on the request path. `BufferedMongoDBSaver` queues those upserts in memory and sends
+# them with one ordered `bulk_write` per collection when `flush_size` operations are
+# waiting or every `flush_interval` seconds, whichever comes first.
+#
+# Durability is explicit:
+#   - reads (get_tuple, list, get_state, ...) flush first, so a thread reads its own writes
+#   - a dynamic `interrupt()` is flushed before the run returns, so the paused thread
+#     survives a restart. A static `interrupt_before`/`interrupt_after` pause is an
+#     ordinary checkpoint to the saver and goes out with the next flush; call `flush()`
+#     after such a run if the pause must not be lost to a crash
+#   - `flush()` is a barrier: when it returns, everything put so far is in MongoDB
+#   - `close()` / leaving the `with` block / interpreter exit (for savers never closed)
+#     flush what is left
+# A crash can lose at most the last `flush_interval` seconds of checkpoints.
+#
+# `mongo_client("mongomock://")` gives an in-process stand-in (needs `mongomock`).
+#
+# History queries all run on the unique (thread_id, checkpoint_ns, checkpoint_id)
+# index MongoDBSaver creates on both collections:
+#   - `list` fetches pending writes once per page of checkpoints, not once per checkpoint
+#   - `list_metadata` / `page` skip the checkpoint payload entirely (projection), with
+#     cursor pagination through `limit` and `before`
+#   - `previous` / `oldest` are a single sorted, limit-1 lookup; `latest_version` (for
+#     TieredSaver) adds a limit-1 writes lookup and counts buffered upserts without flushing
+
+# Only what a history listing needs; the serialized checkpoint is never sent
+_METADATA_PROJECTION = {
+    "_id": 0,
+    "thread_id": 1,
+    "checkpoint_ns": 1,
+    "checkpoint_id": 1,
+    "parent_checkpoint_id": 1,
+    "metadata": 1,
+}
+
+
+class CheckpointInfo(NamedTuple):
+    """A history entry without the checkpoint payload or pending writes."""
+
+    config: dict
+    metadata: dict
+    parent_config: Optional[dict]
+
+
+def mongo_client(uri: str, max_pool_size: int = 50, min_pool_size: int = 0, max_idle_time_ms: int | None = None):
+    """A pooled `MongoClient` for `uri`, or an in-process mongomock client for "mongomock://"."""
+    if uri.startswith("mongomock://"):
+        import mongomock
+        return mongomock.MongoClient()
+    return MongoClient(
+        uri,
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        maxIdleTimeMS=max_idle_time_ms,
+        driver=DRIVER_METADATA,
+    )
+
+
+class _Upsert(NamedTuple):
+    filter: dict
+    update: dict
+    upsert: bool
+
+
+def _write_batch(collection, ops: list[_Upsert]):
+    if type(collection).__module__.startswith("mongomock"):
+        # mongomock's bulk_write doesn't accept current pymongo UpdateOne objects;
+        # in-process there is no round trip to save, so apply them one by one
+        for op in ops:
+            collection.update_one(op.filter, op.update, upsert=op.upsert)
+    else:
+        collection.bulk_write([UpdateOne(*op) for op in ops], ordered=True)
+
+
+class _BufferedCollection:
+    """Collection proxy: `update_one` upserts go to the saver's buffer, anything else flushes it first."""
+
+    def __init__(self, collection, saver: "BufferedMongoDBSaver"):
+        self._collection = collection
+        self._saver = saver
+
+    def update_one(self, filter, update, upsert=False):
+        self._saver._enqueue(self._collection, [_Upsert(filter, update, upsert)])
+
+    def __getattr__(self, name):
+        self._saver.flush()
+        return getattr(self._collection, name)
+
+
+class BufferedMongoDBSaver(MongoDBSaver):
+    """`MongoDBSaver` that batches checkpoint and write upserts behind a background flusher."""
+
+    def __init__(self, client, *, flush_size: int = 64, flush_interval: float = 0.5, **kwargs):
+        super().__init__(client, **kwargs)  # creates the collections' indexes
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.flushes = 0  # bulk_write calls made
+        self.flushed_ops = 0  # upserts sent through them
+
+        self._ops: dict[str, tuple] = {}  # collection name -> (collection, [_Upsert, ...])
+        self._count = 0
+        self._lock = threading.Lock()  # guards the buffer
+        self._flush_lock = threading.Lock()  # one flush at a time, so batches land in order
+        self._error: Exception | None = None
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        self.checkpoint_collection = _BufferedCollection(self.checkpoint_collection, self)
+        self.writes_collection = _BufferedCollection(self.writes_collection, self)
+
+        self._flusher = threading.Thread(target=self._run, name="mongo-checkpoint-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_uri(cls, uri: str, *, max_pool_size: int = 50, min_pool_size: int = 0, **kwargs) -> "BufferedMongoDBSaver":
+        return cls(mongo_client(uri, max_pool_size=max_pool_size, min_pool_size=min_pool_size), **kwargs)
+
+    # ---------------------------
+    # Buffering
+    # ---------------------------
+    def _enqueue(self, collection, ops: list):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("background checkpoint flush failed") from error
+        with self._lock:
+            self._ops.setdefault(collection.name, (collection, []))[1].extend(ops)
+            self._count += len(ops)
+            count = self._count
+        if count >= 4 * self.flush_size:
+            self.flush()  # the flusher is falling behind: make the writer wait
+        elif count >= self.flush_size:
+            self._wake.set()
+
+    def _requeue(self, batches: list[tuple]):
+        # Put unsent batches back in front of anything buffered since
+        with self._lock:
+            merged = {}
+            for collection, ops in batches:
+                merged[collection.name] = (collection, list(ops))
+            for name, (collection, ops) in self._ops.items():
+                merged.setdefault(name, (collection, []))[1].extend(ops)
+            self._ops = merged
+            self._count = sum(len(ops) for _, ops in merged.values())
+
+    def flush(self):
+        """Barrier: returns once every upsert buffered so far has been written."""
+        with self._flush_lock:
+            with self._lock:
+                batches = list(self._ops.values())
+                self._ops, self._count = {}, 0
+            for i, (collection, ops) in enumerate(batches):
+                try:
+                    _write_batch(collection, ops)
+                except Exception:
+                    self._requeue(batches[i:])
+                    raise
+                self.flushes += 1
+                self.flushed_ops += len(ops)
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:  # surfaced to the next writer; the batch stays queued
+                self._error = e
+
+    # ---------------------------
+    # History queries
+    # ---------------------------
+    def _query(self, config, filter=None, before=None) -> dict:
+        query: dict[str, Any] = {}
+        if config is not None:
+            for key in ("thread_id", "checkpoint_ns"):
+                if key in config["configurable"]:
+                    query[key] = _validate_identifier(config["configurable"][key], key)
+        if filter:
+            _validate_filter(filter)
+            for key, value in filter.items():
+                query[f"metadata.{key}"] = dumps_metadata(self.serde, value)
+        if before is not None:
+            query["checkpoint_id"] = {"$lt": _validate_identifier(get_checkpoint_id(before), "before checkpoint_id")}
+        return query
+
+    @staticmethod
+    def _configs(doc) -> tuple[dict, Optional[dict]]:
+        base = {"thread_id": doc["thread_id"], "checkpoint_ns": doc["checkpoint_ns"]}
+        config = {"configurable": {**base, "checkpoint_id": doc["checkpoint_id"]}}
+        parent_id = doc.get("parent_checkpoint_id")
+        parent_config = {"configurable": {**base, "checkpoint_id": parent_id}} if parent_id else None
+        return config, parent_config
+
+    def _tuples(self, docs: list) -> list[CheckpointTuple]:
+        """Checkpoint tuples for `docs`, with all their pending writes fetched in one query."""
+        if not docs:
+            return []
+        writes: dict[tuple, list] = {}
+        query = {
+            "thread_id": {"$in": list({d["thread_id"] for d in docs})},
+            "checkpoint_ns": {"$in": list({d["checkpoint_ns"] for d in docs})},
+            "checkpoint_id": {"$in": [d["checkpoint_id"] for d in docs]},
+        }
+        for w in self.writes_collection.find(query):
+            key = (w["thread_id"], w["checkpoint_ns"], w["checkpoint_id"])
+            writes.setdefault(key, []).append(
+                (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"])))
+            )
+        result = []
+        for doc in docs:
+            config, parent_config = self._configs(doc)
+            result.append(CheckpointTuple(
+                config=config,
+                checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+                metadata=loads_metadata(self.serde, doc["metadata"]),
+                parent_config=parent_config,
+                pending_writes=writes.get((doc["thread_id"], doc["checkpoint_ns"], doc["checkpoint_id"]), []),
+            ))
+        return result
+
+    def list(self, config, *, filter=None, before=None, limit=None, page_size: int = 100) -> Iterator[CheckpointTuple]:
+        """Same results as `MongoDBSaver.list`, newest first, with one writes query per `page_size` checkpoints."""
+        cursor = self.checkpoint_collection.find(
+            self._query(config, filter, before),
+            sort=[("checkpoint_id", DESCENDING)],
+            limit=limit or 0,
+            batch_size=page_size,
+        )
+        while docs := list(islice(cursor, page_size)):
+            yield from self._tuples(docs)
+
+    def list_metadata(self, config, *, filter=None, before=None, limit=None) -> Iterator[CheckpointInfo]:
+        """Newest-first history without checkpoint payloads or writes: one projected index scan."""
+        cursor = self.checkpoint_collection.find(
+            self._query(config, filter, before),
+            projection=_METADATA_PROJECTION,
+            sort=[("checkpoint_id", DESCENDING)],
+            limit=limit or 0,
+        )
+        for doc in cursor:
+            config_, parent_config = self._configs(doc)
+            yield CheckpointInfo(config_, loads_metadata(self.serde, doc["metadata"]), parent_config)
+
+    def page(self, config, limit: int = 20, before=None, filter=None) -> "tuple[list[CheckpointInfo], Optional[dict]]":
+        """One page of `list_metadata`, plus the `before` config of the next page (None on the last page)."""
+        items = list(self.list_metadata(config, filter=filter, before=before, limit=limit + 1))
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, items[-1].config
+
+    def latest_version(self, config) -> Optional[tuple[str, bool]]:
+        """(newest checkpoint id, whether it has pending writes) for the thread, without flushing the buffer.
+
+        Upserts still buffered count as written; anything else is an index-only lookup.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoints, writes = self.checkpoint_collection._collection, self.writes_collection._collection
+        query = self._query({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}})
+        with self._flush_lock:  # no batch is between the buffer and MongoDB while we look at both
+            with self._lock:
+                buffered = [
+                    (collection.name, op.filter)
+                    for collection, ops in self._ops.values()
+                    for op in ops
+                    if op.filter["thread_id"] == thread_id and op.filter["checkpoint_ns"] == checkpoint_ns
+                ]
+            doc = checkpoints.find_one(query, projection={"_id": 0, "checkpoint_id": 1}, sort=[("checkpoint_id", DESCENDING)])
+        ids = [f["checkpoint_id"] for name, f in buffered if name == checkpoints.name] + ([doc["checkpoint_id"]] if doc else [])
+        if not ids:
+            return None
+        checkpoint_id = max(ids)
+        if any(name == writes.name and f["checkpoint_id"] == checkpoint_id for name, f in buffered):
+            return checkpoint_id, True
+        written = writes.find_one({**query, "checkpoint_id": checkpoint_id}, projection={"_id": 1})
+        return checkpoint_id, written is not None
+
+    def _first(self, query: dict, direction: int, skip: int = 0) -> Optional[CheckpointTuple]:
+        docs = list(self.checkpoint_collection.find(query, sort=[("checkpoint_id", direction)], skip=skip, limit=1))
+        return self._tuples(docs)[0] if docs else None
+
+    def previous(self, config) -> Optional[CheckpointTuple]:
+        """The checkpoint created just before `config`'s checkpoint on its thread (not necessarily its parent)."""
+        return self._first(self._query(config, before=config), DESCENDING)
+
+    def oldest(self, config, skip: int = 0) -> Optional[CheckpointTuple]:
+        """The thread's oldest checkpoint, or the `skip`-th one after it."""
+        return self._first(self._query(config), ASCENDING, skip)
+
+    # ---------------------------
+    # Checkpointer API
+    # ---------------------------
+    def put_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        """Same documents as `MongoDBSaver.put_writes`, queued instead of sent with `bulk_write`."""
+        base = {
+            "thread_id": _validate_identifier(config["configurable"]["thread_id"], "thread_id"),
+            "checkpoint_ns": _validate_identifier(config["configurable"]["checkpoint_ns"], "checkpoint_ns"),
+            "checkpoint_id": _validate_identifier(config["configurable"]["checkpoint_id"], "checkpoint_id"),
+            "task_id": _validate_identifier(task_id, "task_id"),
+            "task_path": _validate_identifier(task_path, "task_path"),
+        }
+        # Existing writes are only replaced by special (error, interrupt, ...) writes
+        set_method = "$set" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "$setOnInsert"
+        now = datetime.now(tz=UTC)
+        ops = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized_value = self.serde.dumps_typed(value)
+            doc: dict[str, Any] = {"channel": channel, "type": type_, "value": serialized_value}
+            if self.ttl:
+                doc["created_at"] = now
+            ops.append(_Upsert({**base, "idx": WRITES_IDX_MAP.get(channel, idx)}, {set_method: doc}, True))
+        self._enqueue(self.writes_collection._collection, ops)
+        if any(channel == INTERRUPT for channel, _ in writes):
+            self.flush()  # a paused thread must be resumable after a restart
+
+    def close(self) -> None:
+        atexit.unregister(self.flush)  # the exit hook is what keeps an unclosed saver alive
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        super().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,48 @@
+import hashlib
+import os
+
+# 🖼️ Offline graph rendering
+# `draw_mermaid_png()` sends the graph to the remote mermaid.ink service on every
+# run. Here the PNG is drawn locally with graphviz and cached on disk, keyed by a
+# hash of the graph's topology, so a graph is only ever rendered once.
+#
+#   GRAPH_HEADLESS=1         -> skip visualization entirely (no get_graph() call)
+#   GRAPH_CACHE_DIR=<path>   -> where rendered PNGs are kept (default: .graph_cache)
+
+CACHE_DIR = os.environ.get("GRAPH_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".graph_cache"))
+
+
+def is_headless() -> bool:
+    return os.environ.get("GRAPH_HEADLESS", "").lower() in ("1", "true", "yes")
+
+
+def topology_hash(drawable) -> str:
+    """Hash the nodes and edges of a drawable graph (from `graph.get_graph()`)."""
+    nodes = sorted(drawable.nodes)
+    edges = sorted((e.source, e.target, str(e.data), e.conditional) for e in drawable.edges)
+    return hashlib.sha256(repr((nodes, edges)).encode()).hexdigest()[:16]
+
+
+def render_png(graph, xray: bool = False) -> str | None:
+    """Render a compiled graph to a cached PNG and return its path (None when headless)."""
+    if is_headless():
+        return None
+
+    drawable = graph.get_graph(xray=xray)
+    path = os.path.join(CACHE_DIR, f"{topology_hash(drawable)}.png")
+    if not os.path.exists(path):
+        png = drawable.draw_png()  # local graphviz render, requires pygraphviz
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, path)  # atomic, so concurrent workers never see half a file
+    return path
+
+
+def display_graph(graph, xray: bool = False):
+    """Drop-in replacement for `display(Image(graph.get_graph().draw_mermaid_png()))`."""
+    path = render_png(graph, xray=xray)
+    if path is not None:
+        from IPython.display import Image, display  # only needed when there is something to show
+        display(Image(filename=path))
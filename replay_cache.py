@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import inspect
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.config import get_config
+
+from tool_cache import ToolCache
+
+# ⏪ Deterministic replay for graph nodes
+# Replaying a thread from an old checkpoint re-runs every node after it, and an LLM
+# node re-calls the model even when its input is exactly what it saw the first time.
+# Decorate the node with `@replayable()` and its output is recorded under a hash of
+# the thread, the node's identity and its serialized input state. Recorded outputs
+# are only served to runs started in replay mode, `as_replay(config)`: there a call
+# with the same input on the same thread returns a fresh copy of the recorded output
+# instead of running the node. Ordinary runs always run the node (and record it).
+# After a fork edits the state, the edited node sees a different input and runs for
+# real, and so does everything downstream of it, since its input now contains the
+# new output.
+#
+#   @replayable()
+#   def assistant(state: MessagesState):
+#       return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+#
+#   graph.invoke(None, as_replay(to_replay.config))
+#
+# Message ids are left out of the key: add_messages gives messages without one (tool
+# results, for instance) a fresh random id on every run, which would make a replayed
+# input never match. Only use it on nodes whose output depends on nothing but the
+# content of their input state.
+
+_serde = JsonPlusSerializer()
+
+REPLAY = "replay"  # configurable key that turns on replay mode for a run
+
+
+def as_replay(config: dict) -> dict:
+    """`config` with replay mode on: replayable nodes reuse outputs recorded on the same thread."""
+    return {**config, "configurable": {**config.get("configurable", {}), REPLAY: True}}
+
+
+def _without_ids(value):
+    if isinstance(value, BaseMessage):
+        return value.model_copy(update={"id": None})
+    if isinstance(value, dict):
+        return sorted((k, _without_ids(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_without_ids(v) for v in value]
+    return value
+
+
+def _input_key(thread_id: str, name: str, state) -> str:
+    state = _without_ids(state)
+    type_, data = _serde.dumps_typed(state)
+    return hashlib.sha256(b"\0".join([str(thread_id).encode(), name.encode(), type_.encode(), data])).hexdigest()
+
+
+def _run_scope() -> tuple[str | None, bool]:
+    """(thread id, replay mode on) of the graph run calling the node; (None, False) outside one."""
+    try:
+        configurable = get_config().get("configurable", {})
+    except RuntimeError:  # called outside a runnable context
+        return None, False
+    return configurable.get("thread_id"), bool(configurable.get(REPLAY))
+
+
+def replayable(maxsize: int = 256, ttl: float | None = None):
+    """Record a node's outputs and reuse them for identical input in replay runs; cache is `node.cache`."""
+    def decorator(func):
+        cache = ToolCache(maxsize=maxsize, ttl=ttl)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        def lookup(state):
+            thread_id, replay = _run_scope()
+            if thread_id is None:
+                return None, None, False  # no thread to scope a recording to
+            key = _input_key(thread_id, name, state)
+            found, recorded = cache.get(key) if replay else (False, None)
+            return key, (_serde.loads_typed(recorded) if found else None), found
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)  # keeps the signature LangGraph inspects for a `config` parameter
+            async def wrapper(state, *args, **kwargs):
+                key, output, found = lookup(state)
+                if found:
+                    return output
+                output = await func(state, *args, **kwargs)
+                if key is not None:
+                    cache.put(key, _serde.dumps_typed(output))
+                return output
+        else:
+            @functools.wraps(func)
+            def wrapper(state, *args, **kwargs):
+                key, output, found = lookup(state)
+                if found:
+                    return output
+                output = func(state, *args, **kwargs)
+                if key is not None:
+                    cache.put(key, _serde.dumps_typed(output))
+                return output
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -0,0 +1,311 @@
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Iterable, NamedTuple, Optional
+
+from langgraph.checkpoint.base.id import UUID
+from langgraph.checkpoint.memory import InMemorySaver
+
+from delta_saver import DELTA
+from file_saver import FileSaver
+from graph_constants import INTERRUPT
+
+# 🧹 Checkpoint retention
+# Every superstep adds a checkpoint, so long-lived threads grow without bound.
+# `compact(saver, policy)` drops the checkpoints no rule of the `RetentionPolicy`
+# wants, re-links the parents of the survivors to their nearest kept ancestor (so
+# each kept chain squashes the dropped steps in between), and deletes their pending
+# writes. With MemorySaver the channel blobs only the dropped checkpoints referenced
+# are deleted by a later pass, once `BLOB_GRACE` seconds have passed. `Compactor`
+# runs it on a background thread.
+#
+# A checkpoint is kept if ANY rule keeps it:
+#   - it is one of the thread's `keep_last` newest checkpoints
+#   - it is younger than `max_age` seconds
+#   - it paused on an interrupt (`keep_interrupts`)
+#   - its metadata carries a name (`keep_named`), e.g. a fork point tagged with
+#     graph.invoke(..., {"configurable": {...}, "metadata": {"checkpoint_name": "before-edit"}})
+# The newest checkpoint of every thread is always kept, so running threads are safe.
+#
+# Works with MemorySaver (and DeltaMemorySaver), MongoDBSaver (and BufferedMongoDBSaver)
+# and FileSaver (call its `vacuum()` to reclaim the file space afterwards), directly or
+# behind a TieredSaver.
+
+_GREGORIAN_OFFSET = 0x01B21DD213814000  # 100 ns ticks between 1582-10-15 and the Unix epoch
+
+
+def created_at(checkpoint_id: str) -> float:
+    """Unix time a checkpoint was created, read from its uuid6 id."""
+    return (UUID(checkpoint_id).time - _GREGORIAN_OFFSET) / 1e7
+
+
+class CheckpointEntry(NamedTuple):
+    checkpoint_id: str
+    parent_id: Optional[str]
+    metadata: dict
+    interrupted: bool
+
+
+@dataclass
+class RetentionPolicy:
+    keep_last: Optional[int] = 20
+    max_age: Optional[float] = None  # seconds
+    keep_interrupts: bool = True
+    keep_named: bool = True
+    name_key: str = "checkpoint_name"
+
+    def select(self, entries: list[CheckpointEntry], now: Optional[float] = None) -> set[str]:
+        """Ids of the checkpoints to keep; `entries` are one thread namespace's checkpoints."""
+        now = time.time() if now is None else now
+        newest_first = sorted(entries, key=lambda e: e.checkpoint_id, reverse=True)
+        keep = {newest_first[0].checkpoint_id} if newest_first else set()
+        for i, entry in enumerate(newest_first):
+            if (
+                (self.keep_last is not None and i < self.keep_last)
+                or (self.max_age is not None and now - created_at(entry.checkpoint_id) < self.max_age)
+                or (self.keep_interrupts and entry.interrupted)
+                or (self.keep_named and entry.metadata.get(self.name_key))
+            ):
+                keep.add(entry.checkpoint_id)
+        return keep
+
+
+def _relinked(entries: list[CheckpointEntry], keep: set[str]) -> dict[str, Optional[str]]:
+    """New parent for every kept checkpoint whose parent is being dropped."""
+    parent_of = {e.checkpoint_id: e.parent_id for e in entries}
+
+    def kept_ancestor(checkpoint_id):
+        while checkpoint_id is not None and checkpoint_id not in keep:
+            checkpoint_id = parent_of.get(checkpoint_id)
+        return checkpoint_id
+
+    return {
+        e.checkpoint_id: kept_ancestor(e.parent_id)
+        for e in entries
+        if e.checkpoint_id in keep and e.parent_id is not None and e.parent_id not in keep
+    }
+
+
+# ---------------------------
+# Storage adapters
+# ---------------------------
+BLOB_GRACE = 60.0  # seconds a dropped checkpoint's blobs are kept before they may be deleted
+
+# saver -> {(thread, ns, channel, version): when it was first left behind by a dropped checkpoint}
+_doomed: "weakref.WeakKeyDictionary[InMemorySaver, dict]" = weakref.WeakKeyDictionary()
+
+
+class _MemoryStore:
+    def __init__(self, saver: InMemorySaver):
+        self.saver = saver
+
+    def threads(self) -> list[str]:
+        return list(self.saver.storage)
+
+    def namespaces(self, thread_id: str) -> list[str]:
+        return list(self.saver.storage[thread_id])
+
+    def entries(self, thread_id: str, checkpoint_ns: str) -> list[CheckpointEntry]:
+        serde = self.saver.serde
+        entries = []
+        for checkpoint_id, (_, metadata, parent_id) in list(self.saver.storage[thread_id][checkpoint_ns].items()):
+            writes = self.saver.writes.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            interrupted = any(w[1] == INTERRUPT for w in list(writes.values()))
+            entries.append(CheckpointEntry(checkpoint_id, parent_id, serde.loads_typed(metadata), interrupted))
+        return entries
+
+    def remove(self, thread_id: str, checkpoint_ns: str, entries: list[CheckpointEntry], keep: set[str]) -> int:
+        saver, storage = self.saver, self.saver.storage[thread_id][checkpoint_ns]
+        loads = saver.serde.loads_typed
+        for checkpoint_id, parent_id in _relinked(entries, keep).items():
+            checkpoint, metadata, _ = storage[checkpoint_id]
+            storage[checkpoint_id] = (checkpoint, metadata, parent_id)
+        dropped = [e.checkpoint_id for e in entries if e.checkpoint_id not in keep]
+        doomed = _doomed.setdefault(saver, {})
+        now = time.monotonic()
+        for checkpoint_id in dropped:
+            saved = storage.pop(checkpoint_id, None)
+            saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            if saved is not None:
+                for channel, version in loads(saved[0])["channel_versions"].items():
+                    doomed.setdefault((thread_id, checkpoint_ns, channel, version), now)
+        return len(dropped)
+
+    def collect(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Delete the blobs dropped checkpoints pointed at, once BLOB_GRACE has passed and nothing refers to them."""
+        # Channel blobs are shared between checkpoints by version, and a `put` in flight
+        # refers to blobs no stored checkpoint points at yet: its new versions (written
+        # before the checkpoint) and the versions it carries over from its parent, which
+        # may be a checkpoint this pass dropped (a fork made with `update_state` from an
+        # old checkpoint). So only blobs of dropped checkpoints (and the delta bases they
+        # build on) are deleted, and only if they are still unreferenced BLOB_GRACE
+        # seconds after the drop, by which time the put has stored its checkpoint.
+        saver = self.saver
+        doomed = _doomed.get(saver)
+        if not doomed:
+            return
+        loads = saver.serde.loads_typed
+        storage = saver.storage.get(thread_id, {}).get(checkpoint_ns, {})
+
+        def closure(versions):
+            found, pending = set(), list(versions)
+            while pending:
+                channel, version = pending.pop()
+                found.add((channel, version))
+                blob = saver.blobs.get((thread_id, checkpoint_ns, channel, version))
+                if blob is not None and blob[0] == DELTA and (channel, blob[1][0]) not in found:
+                    pending.append((channel, blob[1][0]))
+            return found
+
+        mine = {key: at for key, at in list(doomed.items()) if key[:2] == (thread_id, checkpoint_ns)}
+        expired = {key[2:] for key, at in mine.items() if time.monotonic() - at >= BLOB_GRACE}
+        if not expired:
+            return
+        referenced = set(saver.pinned_versions(thread_id, checkpoint_ns)) if hasattr(saver, "pinned_versions") else set()
+        referenced |= {
+            (channel, version)
+            for checkpoint, _, _ in list(storage.values())
+            for channel, version in loads(checkpoint)["channel_versions"].items()
+        }
+        referenced = closure(referenced)
+        for channel, version in closure(expired):
+            doomed.pop((thread_id, checkpoint_ns, channel, version), None)
+            if (channel, version) not in referenced:
+                saver.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+
+class _MongoStore:
+    def __init__(self, saver):
+        self.saver = saver
+
+    def threads(self) -> list[str]:
+        return self.saver.checkpoint_collection.distinct("thread_id")
+
+    def namespaces(self, thread_id: str) -> list[str]:
+        return self.saver.checkpoint_collection.distinct("checkpoint_ns", {"thread_id": thread_id})
+
+    def entries(self, thread_id: str, checkpoint_ns: str) -> list[CheckpointEntry]:
+        from langgraph.checkpoint.mongodb.utils import loads_metadata
+
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        interrupted = set(self.saver.writes_collection.distinct("checkpoint_id", {**query, "channel": INTERRUPT}))
+        docs = self.saver.checkpoint_collection.find(
+            query, projection={"_id": 0, "checkpoint_id": 1, "parent_checkpoint_id": 1, "metadata": 1}
+        )
+        return [
+            CheckpointEntry(
+                d["checkpoint_id"],
+                d.get("parent_checkpoint_id"),
+                loads_metadata(self.saver.serde, d["metadata"]),
+                d["checkpoint_id"] in interrupted,
+            )
+            for d in docs
+        ]
+
+    def remove(self, thread_id: str, checkpoint_ns: str, entries: list[CheckpointEntry], keep: set[str]) -> int:
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        for checkpoint_id, parent_id in _relinked(entries, keep).items():
+            self.saver.checkpoint_collection.update_one(
+                {**query, "checkpoint_id": checkpoint_id}, {"$set": {"parent_checkpoint_id": parent_id}}
+            )
+        dropped = [e.checkpoint_id for e in entries if e.checkpoint_id not in keep]
+        self.saver.checkpoint_collection.delete_many({**query, "checkpoint_id": {"$in": dropped}})
+        self.saver.writes_collection.delete_many({**query, "checkpoint_id": {"$in": dropped}})
+        return len(dropped)
+
+
+class _FileStore:
+    def __init__(self, saver: FileSaver):
+        self.saver = saver
+
+    def threads(self) -> list[str]:
+        return list(dict.fromkeys(thread_id for thread_id, _ in self.saver.thread_namespaces()))
+
+    def namespaces(self, thread_id: str) -> list[str]:
+        return [ns for t, ns in self.saver.thread_namespaces() if t == thread_id]
+
+    def entries(self, thread_id: str, checkpoint_ns: str) -> list[CheckpointEntry]:
+        return [CheckpointEntry(*e) for e in self.saver.checkpoint_entries(thread_id, checkpoint_ns)]
+
+    def remove(self, thread_id: str, checkpoint_ns: str, entries: list[CheckpointEntry], keep: set[str]) -> int:
+        dropped = [e.checkpoint_id for e in entries if e.checkpoint_id not in keep]
+        self.saver.drop_checkpoints(thread_id, checkpoint_ns, dropped, _relinked(entries, keep))
+        return len(dropped)
+
+
+def _store_for(saver):
+    if hasattr(saver, "backend"):  # TieredSaver: the cache only holds latest checkpoints, which are always kept
+        return _store_for(saver.backend)
+    if isinstance(saver, InMemorySaver):
+        return _MemoryStore(saver)
+    if isinstance(saver, FileSaver):
+        return _FileStore(saver)
+    if hasattr(saver, "checkpoint_collection") and hasattr(saver, "writes_collection"):
+        return _MongoStore(saver)
+    raise TypeError(f"No retention support for {type(saver).__name__}")
+
+
+def thread_ids(saver) -> list[str]:
+    """Every thread the saver holds checkpoints for."""
+    return _store_for(saver).threads()
+
+
+def compact(saver, policy: RetentionPolicy, thread_ids: Optional[Iterable[str]] = None, now: Optional[float] = None) -> int:
+    """Apply `policy` to `thread_ids` (default: every thread); returns the number of checkpoints removed."""
+    store = _store_for(saver)
+    removed = 0
+    for thread_id in list(thread_ids) if thread_ids is not None else store.threads():
+        for checkpoint_ns in store.namespaces(thread_id):
+            entries = store.entries(thread_id, checkpoint_ns)
+            keep = policy.select(entries, now)
+            if len(keep) < len(entries):
+                removed += store.remove(thread_id, checkpoint_ns, entries, keep)
+            if hasattr(store, "collect"):
+                store.collect(thread_id, checkpoint_ns)
+    return removed
+
+
+class Compactor:
+    """Runs `compact(saver, policy)` every `interval` seconds on a daemon thread."""
+
+    def __init__(self, saver, policy: RetentionPolicy, interval: float = 60.0):
+        self.saver = saver
+        self.policy = policy
+        self.interval = interval
+        self.runs = 0
+        self.removed = 0
+        self.error: Optional[Exception] = None  # last failure; the next run tries again
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        removed = compact(self.saver, self.policy)
+        self.runs += 1
+        self.removed += removed
+        return removed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.error = e
+
+    def start(self) -> "Compactor":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-compactor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
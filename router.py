@@ -2,24 +2,26 @@ import os
 import getpass
 import re
 from typing import Annotated
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, HumanMessage, AnyMessage
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 from typing_extensions import TypedDict
-from IPython.display import Image, display
+from render import display_graph
+from cassette import chat_model, replaying
+from batch import run_batch
 
 # 🔑 Set OpenAI API Key
 def _set_env(var: str):
     if var not in os.environ:
         os.environ[var] = getpass.getpass(f"Enter {var}: ")
 
-_set_env("OPENAI_API_KEY")
+if not replaying():  # a replayed LLM cassette needs no API keys
+    _set_env("OPENAI_API_KEY")
 
 # 🤖 Initialize OpenAI Model
-llm = ChatOpenAI(model="gpt-4o")
+llm = chat_model(model="gpt-4o")
 
 # 🛠️ Define Multiplication and Division Tools
 def multiply(a: int, b: int) -> int:
@@ -56,7 +58,7 @@ builder.add_edge("tools", END)
 
 # 📊 Compile and Display Graph
 graph = builder.compile()
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # 💬 Test Cases
 test_cases = [
@@ -68,8 +70,12 @@ test_cases = [
     "Divide 10 by 2",       # Division by zero
 ]
 
-for test in test_cases:
-    print(f"\n👤 **User:** {test}")
-    messages = graph.invoke({"messages": [HumanMessage(content=test)]})
-    for m in messages['messages']:
+# 🚀 Run all test cases concurrently (results still print in input order)
+inputs = [{"messages": [HumanMessage(content=test)]} for test in test_cases]
+for result in run_batch(graph, inputs, max_concurrency=4):
+    print(f"\n👤 **User:** {test_cases[result.index]}  ({result.latency:.2f}s)")
+    if not result.ok:
+        print(f"⚠️ **Error:** {result.error!r}")
+        continue
+    for m in result.output['messages']:
         print(f"🤖 **Chatbot:** {m.content}")
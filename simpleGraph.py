@@ -1,7 +1,7 @@
 from typing_extensions import TypedDict
 from typing import Literal
 import random
-from IPython.display import Image, display
+from render import display_graph
 from langgraph.graph import StateGraph, START, END
 
 # Define the state structure
@@ -45,7 +45,7 @@ builder.add_edge("sad_node", END)  # End if going to sad_node
 graph = builder.compile()
 
 # Visualize the graph (optional, works in Jupyter Notebook)
-display(Image(graph.get_graph().draw_mermaid_png()))
+display_graph(graph)
 
 # Run the graph with an initial state
 result = graph.invoke({"message": "Hello, world."})
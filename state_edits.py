@@ -0,0 +1,88 @@
+from typing import Optional, Sequence, Union
+
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.types import StateSnapshot, StateUpdate
+
+# ✏️ Several edits, one checkpoint
+# Every `graph.update_state(...)` call reads the thread, writes a new checkpoint and
+# is usually followed by a `get_state` to see the result. `apply_edits` applies a
+# whole batch of edits (replace a message, set a flag, attach a note, ...) as one
+# superstep of `graph.bulk_update_state`: one read, one checkpoint write, all or
+# nothing. It returns the resulting snapshot, built from the checkpoint it just wrote
+# rather than read back from the checkpointer.
+#
+#   snapshot = apply_edits(graph, thread, [
+#       ({"messages": [HumanMessage(content="...", id=old.id)]}, "human_feedback"),
+#       ({"flagged": True}, "reviewer"),                         # (values, as_node)
+#   ])
+#
+# A single edit may leave out as_node; `bulk_update_state` then attributes it the
+# way `update_state` does. With several edits every one needs its as_node.
+
+
+class _LastPut(BaseCheckpointSaver):
+    """Forwards to `backend`, and answers get_tuple for the checkpoint written through it from memory."""
+
+    def __init__(self, backend: BaseCheckpointSaver):
+        super().__init__(serde=backend.serde)
+        self.backend = backend
+        self.saved: Optional[CheckpointTuple] = None
+
+    @property
+    def config_specs(self):
+        return self.backend.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.backend.get_next_version(current, channel)
+
+    def _record(self, config, next_config, checkpoint, metadata) -> None:
+        parent_id = config["configurable"].get("checkpoint_id")
+        parent_config = {"configurable": {**next_config["configurable"], "checkpoint_id": parent_id}} if parent_id else None
+        self.saved = CheckpointTuple(next_config, checkpoint, get_checkpoint_metadata(config, metadata), parent_config, [])
+
+    def _recorded(self, config) -> Optional[CheckpointTuple]:
+        saved = self.saved
+        if saved is None or get_checkpoint_id(config) != saved.config["configurable"]["checkpoint_id"]:
+            return None
+        same_ns = config["configurable"].get("checkpoint_ns", "") == saved.config["configurable"].get("checkpoint_ns", "")
+        return saved if same_ns else None
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        return self._recorded(config) or self.backend.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        return self.backend.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = self.backend.put(config, checkpoint, metadata, new_versions)
+        self._record(config, next_config, checkpoint, metadata)
+        return next_config
+
+    def put_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        self.backend.put_writes(config, writes, task_id, task_path)
+        if self._recorded(config) is not None:
+            self.saved = None  # pending writes now belong to the checkpoint: read it back
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.backend.delete_thread(thread_id)
+
+
+def apply_edits(
+    graph, config, edits: Sequence[Union[dict, tuple[Optional[dict], Optional[str]], StateUpdate]]
+) -> StateSnapshot:
+    """Apply `edits` to the thread in a single checkpoint and return the new state."""
+    updates = [
+        edit if isinstance(edit, StateUpdate)
+        else StateUpdate(*edit) if isinstance(edit, tuple)
+        else StateUpdate(edit, None)
+        for edit in edits
+    ]
+    recorder = _LastPut(graph.checkpointer)
+    graph = graph.copy({"checkpointer": recorder})
+    next_config = graph.bulk_update_state(config, [updates])
+    return graph.get_state(next_config)
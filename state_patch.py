@@ -0,0 +1,136 @@
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+# 🩹 Patch streaming
+# stream_mode="values" re-emits the whole state after every step, so a client that
+# serializes each event pays for the entire message history every time: quadratic
+# in the conversation length. `stream_patches` runs the graph in "values" mode but
+# yields only what changed since the previous event, and `apply_patch` rebuilds the
+# full state on the client:
+#
+#   {"messages": {"append": [msg, ...], "replace": [msg, ...], "remove": [id, ...]},
+#    "set": {"summary": "...", ...},     # changed (or new) non-message keys
+#    "unset": ["key", ...]}              # keys that are gone
+#
+# Empty sections are left out. Messages are matched by id, the way add_messages
+# does. The diff is an identity scan over the previous state's messages (they are
+# the same objects when unchanged), so nothing but the patch is ever serialized.
+# If new messages are not all at the end (a reducer other than add_messages), the
+# message list is sent whole under "set" instead.
+#
+#   state = {}
+#   for patch in stream_patches(graph, {"messages": [...]}, config):
+#       state = apply_patch(state, patch)
+#
+# `stream_modes` adds "patches" to LangGraph's multi-mode streaming: one execution,
+# any mix of native modes and "patches", yielded as (mode, payload) tuples. Values
+# are only diffed if "patches" was asked for, and only emitted if "values" was.
+#
+#   for mode, payload in stream_modes(graph, input, config, ["updates", "patches", "messages"]):
+#       ...
+
+
+def _same(a, b) -> bool:
+    return a is b or a == b
+
+
+def state_patch(before: dict, after: dict, messages_key: str = "messages") -> dict:
+    """What changed from `before` to `after`, in the format `apply_patch` understands."""
+    patch: dict[str, Any] = {}
+    changed = {k: v for k, v in after.items() if k != messages_key and (k not in before or not _same(before[k], v))}
+    gone = [k for k in before if k not in after]
+
+    old = before.get(messages_key) or []
+    new = after.get(messages_key) or []
+    if new is not old:
+        old_by_id = {m.id: m for m in old}
+        new_ids = {m.id for m in new}
+        kept = [m for m in new if m.id in old_by_id]
+        appended = new[len(kept):]
+        if any(m.id in old_by_id for m in appended) or [m.id for m in kept] != [m.id for m in old if m.id in new_ids]:
+            changed[messages_key] = new  # reordered or inserted in the middle: send it whole
+        else:
+            ops = {
+                "append": list(appended),
+                "replace": [m for m in kept if not _same(old_by_id[m.id], m)],
+                "remove": [m.id for m in old if m.id not in new_ids],
+            }
+            ops = {op: items for op, items in ops.items() if items}
+            if ops:
+                patch[messages_key] = ops
+
+    if changed:
+        patch["set"] = changed
+    if gone:
+        patch["unset"] = gone
+    return patch
+
+
+def apply_patch(state: dict, patch: dict, messages_key: str = "messages") -> dict:
+    """New state with `patch` applied; `state` itself is left untouched."""
+    result = {k: v for k, v in state.items() if k not in patch.get("unset", ())}
+    result.update(patch.get("set", {}))
+    ops = patch.get(messages_key)
+    if ops:
+        removed = set(ops.get("remove", ()))
+        replaced = {m.id: m for m in ops.get("replace", ())}
+        result[messages_key] = [
+            replaced.get(m.id, m) for m in result.get(messages_key, []) if m.id not in removed
+        ] + list(ops.get("append", ()))
+    return result
+
+
+def stream_patches(graph, input, config, *, since: Optional[dict] = None, **kwargs) -> Iterator[dict]:
+    """`graph.stream(..., stream_mode="values")` as patches against `since` (default: an empty state)."""
+    previous = since or {}
+    for values in graph.stream(input, config, stream_mode="values", **kwargs):
+        patch = state_patch(previous, values)
+        previous = values
+        if patch:
+            yield patch
+
+
+async def astream_patches(graph, input, config, *, since: Optional[dict] = None, **kwargs) -> AsyncIterator[dict]:
+    previous = since or {}
+    async for values in graph.astream(input, config, stream_mode="values", **kwargs):
+        patch = state_patch(previous, values)
+        previous = values
+        if patch:
+            yield patch
+
+
+def _native(modes: Sequence[str]) -> list[str]:
+    native = [m for m in modes if m != "patches"]
+    if "patches" in modes and "values" not in native:
+        native.append("values")
+    return native
+
+
+def stream_modes(graph, input, config, modes: Sequence[str], *, since: Optional[dict] = None, **kwargs) -> Iterator[tuple[str, Any]]:
+    """(mode, payload) for every requested mode, "patches" included, from a single run."""
+    previous = since or {}
+    for mode, payload in graph.stream(input, config, stream_mode=_native(modes), **kwargs):
+        if mode == "values":
+            if "patches" in modes:
+                patch = state_patch(previous, payload)
+                previous = payload
+                if patch:
+                    yield "patches", patch
+            if "values" not in modes:
+                continue
+        yield mode, payload
+
+
+async def astream_modes(
+    graph, input, config, modes: Sequence[str], *, since: Optional[dict] = None, **kwargs
+) -> AsyncIterator[tuple[str, Any]]:
+    previous = since or {}
+    async for mode, payload in graph.astream(input, config, stream_mode=_native(modes), **kwargs):
+        if mode == "values":
+            if "patches" in modes:
+                patch = state_patch(previous, payload)
+                previous = payload
+                if patch:
+                    yield "patches", patch
+            if "values" not in modes:
+                continue
+        yield mode, payload
@@ -0,0 +1,198 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage
+
+from token_count import TokenCounter
+
+# 📝 Incremental conversation summary
+# Re-summarizing the whole history on every pass makes each summary cost more than
+# the last. `SummaryMemory` records a watermark in the state: the ids of messages
+# already folded into the summary. Only messages past the watermark are sent, along
+# with the current summary, and a pass is triggered once those unsummarized messages
+# exceed `max_tokens`, so every summarization call is roughly the same size.
+#
+#   class State(MessagesState):
+#       summary: str
+#       summarized_ids: list[str]
+#
+#   memory = SummaryMemory(model, openai_token_counter("gpt-4o"), max_tokens=300)
+#   workflow.add_node("summarize_conversation", memory.summarize)
+
+
+class SummaryMemory:
+    """Running summary of a messages state, extended only with messages it hasn't seen."""
+
+    def __init__(
+        self,
+        model,
+        token_counter: TokenCounter,
+        max_tokens: int = 1000,
+        keep_last: int = 2,
+        summary_key: str = "summary",
+        watermark_key: str = "summarized_ids",
+    ):
+        self.model = model
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.summary_key = summary_key
+        self.watermark_key = watermark_key
+
+    def pending(self, state) -> list[BaseMessage]:
+        """Messages not yet folded into the summary, in conversation order."""
+        summarized = set(state.get(self.watermark_key) or ())
+        return [m for m in state["messages"] if m.id not in summarized]
+
+    def pending_tokens(self, state) -> int:
+        return sum(self.token_counter.count(m) for m in self.pending(state))
+
+    def should_summarize(self, state) -> bool:
+        return self.pending_tokens(state) > self.max_tokens
+
+    def summarize(self, state) -> dict:
+        """Graph node: extend the summary with the pending messages and drop all but the last few."""
+        summary = state.get(self.summary_key, "")
+        if summary:
+            prompt = (
+                f"This is a summary of the conversation so far: {summary}\n\n"
+                "Extend the summary by including the new messages above:"
+            )
+        else:
+            prompt = "Create a summary of the conversation above:"
+
+        response = self.model.invoke(self.pending(state) + [HumanMessage(content=prompt)])
+
+        messages = state["messages"]
+        cut = max(len(messages) - self.keep_last, 0)
+        return {
+            self.summary_key: response.content,
+            "messages": [RemoveMessage(id=m.id) for m in messages[:cut]],
+            # Everything left in the state is now covered by the summary
+            self.watermark_key: [m.id for m in messages[cut:]],
+        }
+
+
+# ⏳ Summarizing off the critical path
+# `BackgroundSummarizer` runs `SummaryMemory` after a turn has already returned and
+# commits the result with `graph.update_state(..., as_node=...)`, so the user never
+# waits for the summarizer call. Turns and commits on the same thread are serialized
+# by a per-thread lock (the summarizer LLM call itself runs outside it). If a turn
+# lands while a summary is being written, the commit is rebased onto the newer state:
+# deletes and watermark ids that no longer exist are dropped, and a summary computed
+# from a stale summary is thrown away and recomputed.
+#
+#   workflow.add_edge("conversation", END)                # summary no longer inline
+#   workflow.add_node("summarize_conversation", memory.summarize)
+#   workflow.add_edge("summarize_conversation", END)      # target for update_state only
+#
+#   with BackgroundSummarizer(graph, memory) as summarizer:
+#       summarizer.invoke({"messages": [...]}, config)    # or: with summarizer.turn(config): graph.stream(...)
+
+
+class BackgroundSummarizer:
+    """Deferred summarization for a compiled graph, committed as a follow-up checkpoint per thread."""
+
+    def __init__(self, graph, memory: SummaryMemory, as_node: str = "summarize_conversation", max_workers: int = 2):
+        self.graph = graph
+        self.memory = memory
+        self.as_node = as_node
+        self.committed = 0  # summaries written to a thread
+        self.recomputed = 0  # summaries discarded because the thread's summary moved on
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self._guard = threading.Lock()
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._running: dict[tuple, Future] = {}
+        self._recheck: set[tuple] = set()  # threads that had a turn while their job was running
+
+    @staticmethod
+    def _thread_config(config) -> dict:
+        # Always work on the latest checkpoint of the thread, never a pinned checkpoint_id
+        configurable = config["configurable"]
+        return {"configurable": {
+            "thread_id": configurable["thread_id"],
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+        }}
+
+    @staticmethod
+    def _key(config) -> tuple:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+    def lock(self, config) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(self._key(config), threading.Lock())
+
+    # ---------------------------
+    # Turns
+    # ---------------------------
+    @contextmanager
+    def turn(self, config):
+        """Hold the thread while a turn runs, then schedule its summary."""
+        with self.lock(config):
+            yield
+        self.schedule(config)
+
+    def invoke(self, input, config, **kwargs):
+        with self.turn(config):
+            return self.graph.invoke(input, config, **kwargs)
+
+    # ---------------------------
+    # Background work
+    # ---------------------------
+    def schedule(self, config) -> Future:
+        """Summarize the thread in the background if it is over budget; one job per thread at a time."""
+        key = self._key(config)
+        with self._guard:
+            running = self._running.get(key)
+            if running is not None and not running.done():
+                self._recheck.add(key)  # the running job checks the budget again before exiting
+                return running
+            self._recheck.discard(key)  # left over from a job that failed
+            future = self._executor.submit(self._summarize, self._thread_config(config))
+            self._running[key] = future
+            return future
+
+    def _summarize(self, config):
+        key = self._key(config)
+        summary_key, watermark_key = self.memory.summary_key, self.memory.watermark_key
+        while True:
+            values = self.graph.get_state(config).values
+            if not self.memory.should_summarize(values):
+                with self._guard:
+                    if key not in self._recheck:
+                        # Leave in the same critical section, so a turn from now on schedules a new job
+                        self._running.pop(key, None)
+                        return
+                    self._recheck.discard(key)
+                continue
+            update = self.memory.summarize(values)  # the slow part; turns keep running meanwhile
+
+            with self.lock(config):
+                latest = self.graph.get_state(config).values
+                if latest.get(summary_key, "") != values.get(summary_key, ""):
+                    self.recomputed += 1
+                    continue
+                live = {m.id for m in latest["messages"]}
+                update["messages"] = [m for m in update["messages"] if m.id in live]
+                update[watermark_key] = [i for i in update[watermark_key] if i in live]
+                self.graph.update_state(config, update, as_node=self.as_node)
+                self.committed += 1
+
+    def wait(self, timeout: float | None = None):
+        """Block until every scheduled summary has been committed (re-raising any failure)."""
+        with self._guard:
+            running = list(self._running.values())
+        for future in running:
+            future.result(timeout)
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,72 @@
+import atexit
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.types import Command, interrupt
+
+pytest.importorskip("mongomock")
+
+from mongo_saver import BufferedMongoDBSaver, mongo_client  # noqa: E402
+
+
+def _graph(saver, **compile_kwargs):
+    def ask(state):
+        answer = interrupt("ok?") if state["messages"][-2].content == "stop" else "-"
+        return {"messages": AIMessage(content=f"answer {answer}")}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("echo", lambda state: {"messages": AIMessage(content="echo")})
+    builder.add_node("ask", ask)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", "ask")
+    builder.add_edge("ask", END)
+    return builder.compile(checkpointer=saver, **compile_kwargs)
+
+
+def _history(graph, config):
+    return [(s.config, s.values, s.next, s.metadata) for s in graph.get_state_history(config)]
+
+
+@pytest.fixture
+def client():
+    return mongo_client("mongomock://")
+
+
+def test_buffered_writes_match_plain_saver(client):
+    config = {"configurable": {"thread_id": "1"}}
+    with BufferedMongoDBSaver(client, flush_size=1000, flush_interval=60) as saver:
+        graph = _graph(saver)
+        for i in range(3):
+            graph.invoke({"messages": [HumanMessage(f"hi {i}")]}, config)
+        # Each run's first read flushed the run before; the last run is still buffered
+        checkpoints = MongoDBSaver(client).checkpoint_collection  # unbuffered view of the same data
+        written = checkpoints.count_documents({})
+        assert saver._count > 0
+        buffered = _history(graph, config)  # reads flush first
+        assert saver._count == 0 and checkpoints.count_documents({}) > written
+    assert buffered == _history(_graph(MongoDBSaver(client)), config)
+
+
+def test_dynamic_interrupt_is_flushed_before_the_run_returns(client):
+    config = {"configurable": {"thread_id": "1"}}
+    saver = BufferedMongoDBSaver(client, flush_size=1000, flush_interval=60)
+    graph = _graph(saver)
+    graph.invoke({"messages": [HumanMessage("stop")]}, config)
+    assert _graph(MongoDBSaver(client)).get_state(config).next == ("ask",)  # without flushing `saver`
+
+    result = graph.invoke(Command(resume="yes"), config)
+    assert result["messages"][-1].content == "answer yes"
+    saver.close()
+
+
+def test_close_flushes_and_unregisters_the_exit_hook(client, monkeypatch):
+    unregistered = []
+    monkeypatch.setattr(atexit, "unregister", unregistered.append)
+    config = {"configurable": {"thread_id": "1"}}
+    saver = BufferedMongoDBSaver(client, flush_size=1000, flush_interval=60)
+    _graph(saver, interrupt_before=["ask"]).invoke({"messages": [HumanMessage("hi")]}, config)
+    saver.close()
+    assert unregistered == [saver.flush]
+    assert _graph(MongoDBSaver(client)).get_state(config).next == ("ask",)
@@ -0,0 +1,216 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterator, NamedTuple, Optional
+
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+# 🔥 Two-tier checkpointer
+# Human-in-the-loop threads are read far more often than they are written:
+# get_state, update_state and every resume start by loading the thread's latest
+# checkpoint from the durable saver. `TieredSaver` keeps the latest checkpoint of
+# recently used threads in an in-process LRU bounded by serialized bytes (not entry
+# count) and writes everything through to the backend (MongoDBSaver, FileSaver,
+# MemorySaver, ...), which stays the source of truth.
+#
+# A cached checkpoint is only served after a version check: the backend's newest
+# checkpoint id for the thread must still be the cached one and have no pending
+# writes (the cache only holds checkpoints without any), so a checkpoint or task
+# write made by another process (or directly on the backend), such as an
+# `interrupt()` raised by a resume elsewhere, is never hidden. FileSaver,
+# BufferedMongoDBSaver and MemorySaver answer that from their index, through
+# `latest_version`; any other backend gets no cache hits rather than possibly stale ones.
+#
+#   memory = TieredSaver(BufferedMongoDBSaver.from_uri(MONGODB_URI), max_bytes=64 * 2**20)
+#   graph = builder.compile(checkpointer=memory)
+
+
+class _Entry(NamedTuple):
+    checkpoint_id: str
+    config: dict
+    checkpoint: tuple[str, bytes]  # serde-typed, so a hit hands out a fresh copy
+    metadata: dict
+    parent_config: Optional[dict]
+    size: int
+
+
+class TieredSaver(BaseCheckpointSaver):
+    """Write-through LRU cache of each thread's latest checkpoint in front of a durable saver."""
+
+    def __init__(self, backend: BaseCheckpointSaver, *, max_bytes: int = 64 * 2**20):
+        super().__init__(serde=backend.serde)
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0  # a backend read that raced an invalidation must not fill the cache
+
+    @property
+    def config_specs(self):
+        return self.backend.config_specs
+
+    def get_next_version(self, current, channel):
+        return self.backend.get_next_version(current, channel)
+
+    @staticmethod
+    def _key(config) -> tuple[str, str]:
+        configurable = config["configurable"]
+        return configurable["thread_id"], configurable.get("checkpoint_ns", "")
+
+    # ---------------------------
+    # Cache
+    # ---------------------------
+    def _latest_version(self, config) -> Optional[tuple[str, bool]]:
+        """Backend's (newest checkpoint id, has pending writes) for the thread, or None if it can't tell cheaply."""
+        if hasattr(self.backend, "latest_version"):
+            return self.backend.latest_version(config)
+        if isinstance(self.backend, InMemorySaver):
+            thread_id, checkpoint_ns = self._key(config)
+            checkpoints = self.backend.storage.get(thread_id, {}).get(checkpoint_ns)
+            if not checkpoints:
+                return None
+            checkpoint_id = max(checkpoints)
+            return checkpoint_id, bool(self.backend.writes.get((thread_id, checkpoint_ns, checkpoint_id)))
+        return None
+
+    def _remember(self, config, checkpoint, metadata, parent_config) -> None:
+        typed = self.serde.dumps_typed(checkpoint)
+        size = len(typed[1])
+        if size > self.max_bytes:
+            return self._forget(self._key(config))
+        entry = _Entry(checkpoint["id"], config, typed, metadata, parent_config, size)
+        with self._lock:
+            old = self._cache.pop(self._key(config), None)
+            if old is not None:
+                self.cached_bytes -= old.size
+            self._cache[self._key(config)] = entry
+            self.cached_bytes += size
+            while self.cached_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self.cached_bytes -= evicted.size
+
+    def _forget(self, key: tuple[str, str], checkpoint_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._invalidations += 1
+            entry = self._cache.get(key)
+            if entry is not None and checkpoint_id in (None, entry.checkpoint_id):
+                del self._cache[key]
+                self.cached_bytes -= entry.size
+
+    def _lookup(self, config) -> Optional[CheckpointTuple]:
+        key = self._key(config)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None:
+            return None
+        requested = get_checkpoint_id(config)
+        if requested is None:
+            # Cached entries never have pending writes; one written since means a step ran on it
+            if self._latest_version(config) != (entry.checkpoint_id, False):
+                self._forget(key)
+                return None
+        elif requested != entry.checkpoint_id:
+            return None  # an older checkpoint (history, time travel): not cached
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+        return CheckpointTuple(
+            entry.config, self.serde.loads_typed(entry.checkpoint), dict(entry.metadata), entry.parent_config, []
+        )
+
+    def _fill(self, config, saved: Optional[CheckpointTuple], invalidations: int) -> None:
+        # Only the latest checkpoint is cached, and only without pending writes: those
+        # belong to a step that is still running or stopped on an interrupt
+        if saved is None or get_checkpoint_id(config) is not None or saved.pending_writes:
+            return
+        if invalidations == self._invalidations:
+            self._remember(saved.config, saved.checkpoint, saved.metadata, saved.parent_config)
+
+    def _put_through(self, config, next_config, checkpoint, metadata) -> None:
+        parent_id = config["configurable"].get("checkpoint_id")
+        parent_config = {"configurable": {**next_config["configurable"], "checkpoint_id": parent_id}} if parent_id else None
+        self._remember(next_config, checkpoint, get_checkpoint_metadata(config, metadata), parent_config)
+
+    def _drop_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for key in [k for k in self._cache if k[0] == thread_id]:
+                self.cached_bytes -= self._cache.pop(key).size
+
+    # ---------------------------
+    # Sync API
+    # ---------------------------
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        cached = self._lookup(config)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        invalidations = self._invalidations
+        saved = self.backend.get_tuple(config)
+        self._fill(config, saved, invalidations)
+        return saved
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator[CheckpointTuple]:
+        return self.backend.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = self.backend.put(config, checkpoint, metadata, new_versions)
+        self._put_through(config, next_config, checkpoint, metadata)
+        return next_config
+
+    def put_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        self.backend.put_writes(config, writes, task_id, task_path)
+        self._forget(self._key(config), get_checkpoint_id(config))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.backend.delete_thread(thread_id)
+        self._drop_thread(thread_id)
+
+    # ---------------------------
+    # Async API
+    # ---------------------------
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        cached = await asyncio.to_thread(self._lookup, config)  # the version check may hit the network
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        invalidations = self._invalidations
+        saved = await self.backend.aget_tuple(config)
+        self._fill(config, saved, invalidations)
+        return saved
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        async for item in self.backend.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        next_config = await self.backend.aput(config, checkpoint, metadata, new_versions)
+        self._put_through(config, next_config, checkpoint, metadata)
+        return next_config
+
+    async def aput_writes(self, config, writes, task_id: str, task_path: str = "") -> None:
+        await self.backend.aput_writes(config, writes, task_id, task_path)
+        self._forget(self._key(config), get_checkpoint_id(config))
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.backend.adelete_thread(thread_id)
+        self._drop_thread(thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threads": len(self._cache),
+            "cached_bytes": self.cached_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,98 @@
+import threading
+from bisect import bisect_left
+from operator import is_
+from typing import Callable, Hashable
+
+from langchain_core.messages import BaseMessage
+
+# 🔢 Incremental token counting
+# `trim_messages(..., token_counter=llm)` re-tokenizes the whole history on every
+# turn. `TokenCounter` tokenizes each message once: counts are cached in the counter,
+# keyed on what the tokenizer sees (type, name, content, tool calls), so a message
+# whose content is changed (e.g. `model_copy(update={"content": ...})`) is counted
+# again and the messages themselves are never modified.
+# `trim_last` keeps prefix sums for the history it saw last; when the next call gets
+# the same messages plus new ones, only the new ones are added before the cut point
+# is found with a binary search.
+
+
+def _fingerprint(message: BaseMessage) -> Hashable:
+    """Everything about a message a chat tokenizer counts (its id and metadata are not sent)."""
+    content = message.content if isinstance(message.content, str) else repr(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    return (
+        message.type,
+        message.name,
+        content,
+        getattr(message, "tool_call_id", None),
+        repr(tool_calls) if tool_calls else None,
+        repr(message.additional_kwargs) if message.additional_kwargs else None,
+    )
+
+
+class TokenCounter:
+    """Caches per-message token counts from `count_fn` (e.g. `ChatOpenAI.get_num_tokens_from_messages`)."""
+
+    def __init__(self, count_fn: Callable[[list[BaseMessage]], int], maxsize: int = 100_000):
+        self.count_fn = count_fn
+        self.maxsize = maxsize
+        # Per-request overhead (e.g. the reply priming OpenAI adds once per request)
+        self.base = count_fn([])
+        self.tokenized = 0  # how many messages actually went through the tokenizer
+        self._counts: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._seen: list[BaseMessage] = []  # the history `_prefix` was built for
+        self._prefix: list[int] = [0]  # _prefix[i] = tokens of _seen[:i]
+
+    def count(self, message: BaseMessage) -> int:
+        key = _fingerprint(message)
+        cached = self._counts.get(key)
+        if cached is None:
+            cached = self.count_fn([message]) - self.base
+            self.tokenized += 1
+            if len(self._counts) >= self.maxsize:
+                self._counts.pop(next(iter(self._counts)))  # oldest first
+            self._counts[key] = cached
+        return cached
+
+    def total(self, messages: list[BaseMessage]) -> int:
+        return self.base + sum(self.count(m) for m in messages)
+
+    def _prefix_sums(self, messages: list[BaseMessage]) -> list[int]:
+        """Prefix sums for `messages`, extending the last ones from the first message that differs."""
+        seen = self._seen
+        if len(seen) <= len(messages) and all(map(is_, seen, messages)):
+            same = len(seen)  # the usual turn: the same history plus new messages
+        else:
+            same = next((i for i, (a, b) in enumerate(zip(seen, messages)) if a is not b), min(len(seen), len(messages)))
+        prefix = self._prefix
+        del prefix[same + 1:]
+        for message in messages[same:]:
+            prefix.append(prefix[-1] + self.count(message))
+        del seen[same:]
+        seen.extend(messages[same:])
+        return prefix
+
+    def trim_last(self, messages: list[BaseMessage], max_tokens: int) -> list[BaseMessage]:
+        """Keep the longest run of most recent whole messages that fits in `max_tokens`.
+
+        Same result as `trim_messages(messages, max_tokens=max_tokens, strategy="last",
+        token_counter=..., allow_partial=False)` for counters that add up per message.
+        """
+        with self._lock:
+            prefix = self._prefix_sums(messages)
+            # The last n - i messages cost prefix[n] - prefix[i]; find the smallest i that fits
+            start = bisect_left(prefix, prefix[-1] - (max_tokens - self.base))
+        return messages[start:]
+
+
+def openai_token_counter(model: str = "gpt-4o") -> TokenCounter:
+    """tiktoken counts for `model`, or a character-based estimate when replaying a cassette offline."""
+    from cassette import replaying
+
+    if replaying():
+        from langchain_core.messages.utils import count_tokens_approximately
+        return TokenCounter(count_tokens_approximately)
+
+    from langchain_openai import ChatOpenAI
+    return TokenCounter(ChatOpenAI(model=model).get_num_tokens_from_messages)
@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_core.runnables.config import merge_configs
+
+try:
+    # Marks a handler that wants tokens: with one attached, `model.invoke` streams internally
+    from langchain_core.tracers._streaming import _StreamingCallbackHandler
+except ImportError:  # older langchain-core releases
+    _StreamingCallbackHandler = object
+
+# 🔤 Token streaming without the event firehose
+# `astream_events` attaches an event tracer to every runnable in the run, so each
+# chain start/end, node and tool call builds an event dict, and its include_*/
+# exclude_* filters only drop those events after they have been built. Filtering on
+# `event["event"] == "on_chat_model_stream"` client-side is the same cost again, and
+# so is stream_mode="messages" filtered on metadata: it emits every token of every
+# model (and every message a node returns) before anyone looks at the node.
+# `astream_tokens` filters at the source instead. It adds one callback handler to the
+# run that decides when a chat model starts whether its node and tags were asked
+# for; the tokens of any other model call are never forwarded, and no other event
+# is produced at all.
+#
+#   async for chunk, metadata in astream_tokens(graph, input, config, nodes=["conversation"]):
+#       print(chunk.content, end="|")
+#
+# Models inside subgraphs are not streamed, as with stream_mode="messages". See
+# module 3/streaming/stream_benchmark.py for chunks/sec against the alternatives.
+
+_DONE = object()
+
+
+class _TokenHandler(BaseCallbackHandler, _StreamingCallbackHandler):
+    """Forwards the tokens of chat model calls made by the selected nodes, with the selected tags."""
+
+    run_inline = True  # called where the model runs, in token order
+
+    def __init__(self, emit, nodes: Optional[set], tags: Optional[set]):
+        self.emit = emit
+        self.nodes = nodes
+        self.tags = tags
+        self.metadata: dict[UUID, dict] = {}  # model runs being forwarded
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, tags=None, metadata=None, **kwargs: Any):
+        if not metadata or "langgraph_node" not in metadata:
+            return
+        if "|" in metadata.get("langgraph_checkpoint_ns", ""):
+            return  # a subgraph's model
+        if self.nodes is not None and metadata["langgraph_node"] not in self.nodes:
+            return
+        user_tags = [t for t in tags or () if not t.startswith("seq:step")]
+        if self.tags is not None and self.tags.isdisjoint(user_tags):
+            return
+        self.metadata[run_id] = {**metadata, "tags": user_tags}
+
+    def on_llm_new_token(self, token: str, *, chunk=None, run_id: UUID, **kwargs: Any):
+        metadata = self.metadata.get(run_id)
+        if metadata is not None and isinstance(chunk, ChatGenerationChunk) and isinstance(chunk.message, AIMessageChunk):
+            self.emit((chunk.message, metadata))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        self.metadata.pop(run_id, None)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self.metadata.pop(run_id, None)
+
+
+def _with_handler(config, handler) -> dict:
+    return merge_configs(config or {}, {"callbacks": [handler]})
+
+
+def stream_tokens(
+    graph, input, config, *, nodes: Optional[Iterable[str]] = None, tags: Optional[Iterable[str]] = None, **kwargs
+) -> Iterator[tuple[AIMessageChunk, dict]]:
+    """(token chunk, metadata) pairs from the chat models of `nodes` (default: all), optionally only those tagged `tags`.
+
+    The run happens on a worker thread; stopping early does not stop it.
+    """
+    chunks: queue.Queue = queue.Queue()
+    handler = _TokenHandler(chunks.put, set(nodes) if nodes is not None else None, set(tags) if tags is not None else None)
+    failure = []
+
+    def run():
+        try:
+            graph.invoke(input, _with_handler(config, handler), **kwargs)
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            chunks.put(_DONE)
+
+    context = contextvars.copy_context()  # the caller's tracing/config context
+    threading.Thread(target=context.run, args=(run,), name="stream-tokens", daemon=True).start()
+    while (item := chunks.get()) is not _DONE:
+        yield item
+    if failure:
+        raise failure[0]
+
+
+async def astream_tokens(
+    graph, input, config, *, nodes: Optional[Iterable[str]] = None, tags: Optional[Iterable[str]] = None, **kwargs
+) -> AsyncIterator[tuple[AIMessageChunk, dict]]:
+    chunks: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    def emit(item):
+        # Async models call back on the loop; sync nodes run in worker threads
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            chunks.put_nowait(item)
+        else:
+            loop.call_soon_threadsafe(chunks.put_nowait, item)
+
+    handler = _TokenHandler(emit, set(nodes) if nodes is not None else None, set(tags) if tags is not None else None)
+    run = asyncio.create_task(graph.ainvoke(input, _with_handler(config, handler), **kwargs))
+    run.add_done_callback(lambda _: loop.call_soon(chunks.put_nowait, _DONE))
+    try:
+        while (item := await chunks.get()) is not _DONE:
+            yield item
+        await run  # re-raise a failed run
+    finally:
+        run.cancel()  # the consumer stopped early (or was cancelled): stop the run too
@@ -0,0 +1,81 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# 🗃️ Result cache for pure tools
+# Decorate a deterministic tool with `@cacheable()` and ToolNode will reuse earlier
+# results for the same arguments, across threads and time-travel replays. Entries
+# are evicted least-recently-used beyond `maxsize` and expire after `ttl` seconds.
+# Arguments are normalized by binding them to the signature, so `add(3, 4)`,
+# `add(a=3, b=4)` and `add(b=4, a=3)` share one entry.
+
+
+class ToolCache:
+    """Thread-safe LRU + TTL cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+def _cache_key(signature: inspect.Signature, args, kwargs) -> str:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return json.dumps(bound.arguments, sort_keys=True, default=repr)
+
+
+def cacheable(maxsize: int = 1024, ttl: float | None = None):
+    """Mark a pure tool as cacheable; its `ToolCache` is available as `tool.cache`."""
+    def decorator(func):
+        cache = ToolCache(maxsize=maxsize, ttl=ttl)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)  # keeps name, docstring and annotations for the tool schema
+        def wrapper(*args, **kwargs):
+            key = _cache_key(signature, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                return value
+            value = func(*args, **kwargs)
+            cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator